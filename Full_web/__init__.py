@@ -0,0 +1,7 @@
+# Load the Celery app (if installed) so @shared_task binds to it.
+try:
+    from .celery import app as celery_app
+except ImportError:  # celery not installed -> synchronous analysis only
+    celery_app = None
+
+__all__ = ("celery_app",)
@@ -1,17 +1,29 @@
+import os
 from pathlib import Path
 import environ
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+# abspath is a pure string op; resolve() would stat every path component on boot.
+BASE_DIR = Path(os.path.abspath(__file__)).parent.parent
+TEMPLATES_DIR = BASE_DIR / "templates"
+STATIC_DIR = BASE_DIR / "static"
 
-# Load environment variables
-env = environ.Env()
+# Load environment variables (casts + defaults declared once)
+env = environ.Env(
+    DEBUG=(bool, False),
+    ALLOWED_HOSTS=(list, ["127.0.0.1", "localhost"]),
+    EMAIL_BACKEND=(str, "django.core.mail.backends.smtp.EmailBackend"),
+    EMAIL_HOST=(str, "smtp.gmail.com"),
+    EMAIL_USE_TLS=(bool, True),
+    EMAIL_USE_SSL=(bool, False),
+    EMAIL_TIMEOUT=(int, 30),
+)
 environ.Env.read_env(BASE_DIR / ".env")
 
 # Core Django Settings
 SECRET_KEY = env("DJANGO_SECRET_KEY")
-DEBUG = env.bool("DEBUG", default=False)
-ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["127.0.0.1", "localhost"])
+DEBUG = env("DEBUG")
+ALLOWED_HOSTS = env("ALLOWED_HOSTS")
 
 # Application definition (Keep this as is)
 INSTALLED_APPS = [
@@ -39,7 +51,7 @@ ROOT_URLCONF = 'Full_web.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / "templates"],
+        'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -62,6 +74,22 @@ DATABASES = {
     }
 }
 
+# Cache + sessions: with REDIS_URL set, cache and sessions both live in Redis
+# (shared by every worker, no django_session query per request). Without it,
+# sessions stay DB-backed but reads go through the per-process cache.
+REDIS_URL = env("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+    SESSION_ENGINE = "main.sessions"  # cache sessions, stored signed + zlib-compressed
+else:
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "default"
+
 # Password validation (Keep this as is)
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -86,21 +114,44 @@ USE_TZ = True
 
 # Static files setup (Keep this as is)
 STATIC_URL = '/static/'
-STATICFILES_DIRS = [BASE_DIR / "static"]
+STATICFILES_DIRS = [STATIC_DIR]
+
+# Generated files (report charts), content-addressed under MEDIA_ROOT/charts/
+MEDIA_URL = '/media/'
+MEDIA_ROOT = env("MEDIA_ROOT", default=str(BASE_DIR / "media"))
 
 # Email settings
-EMAIL_BACKEND = env("EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend")
-EMAIL_HOST = env("EMAIL_HOST", default="smtp.gmail.com")
-EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=True)
-EMAIL_USE_SSL = env.bool("EMAIL_USE_SSL", default=False)
+EMAIL_BACKEND = env("EMAIL_BACKEND")
+EMAIL_HOST = env("EMAIL_HOST")
+EMAIL_USE_TLS = env("EMAIL_USE_TLS")
+EMAIL_USE_SSL = env("EMAIL_USE_SSL")
 EMAIL_PORT = env.int("EMAIL_PORT", default=(465 if EMAIL_USE_SSL else 587))
 EMAIL_HOST_USER = env("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default=EMAIL_HOST_USER)
 SERVER_EMAIL = env("SERVER_EMAIL", default=EMAIL_HOST_USER)
-EMAIL_TIMEOUT = env.int("EMAIL_TIMEOUT", default=30)
+EMAIL_TIMEOUT = env("EMAIL_TIMEOUT")
 if EMAIL_USE_TLS and EMAIL_USE_SSL:
     raise ValueError("Configure either TLS(587) or SSL(465), not both")
 
+# Celery (optional): OTP mail goes through the worker whenever a broker is set.
+# Background analysis is opt-in and also needs REDIS_URL, since the worker hands
+# the report back through the shared cache; the upload page then polls for it.
+CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="")
+CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default=CELERY_BROKER_URL)
+CELERY_TASK_SERIALIZER = "json"
+CELERY_RESULT_SERIALIZER = "json"
+ANALYZE_ASYNC = env.bool("ANALYZE_ASYNC", default=False) and bool(CELERY_BROKER_URL and REDIS_URL)
+OTP_MAIL_ASYNC = bool(CELERY_BROKER_URL)
+# Queued PDF renders (opt-in): the worker pre-renders into the shared cache and
+# writes on-demand PDFs to PDF_DIR, which web and worker must both see.
+PDF_ASYNC = env.bool("PDF_ASYNC", default=False) and bool(CELERY_BROKER_URL and REDIS_URL)
+# Where workers write rendered PDFs (default: system temp dir); files are deleted
+# once fetched and swept after an hour. With an nginx `internal` location
+# aliased to PDF_DIR, set the prefix to let nginx serve them:
+#   location /internal-pdfs/ { internal; alias /var/pdfs/; }
+PDF_DIR = env("PDF_DIR", default="")
+PDF_ACCEL_REDIRECT_PREFIX = env("PDF_ACCEL_REDIRECT_PREFIX", default="")
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.urls import path
 from main import views
 from main import score_utils
@@ -25,9 +27,16 @@ urlpatterns = [
     path('analyze_resume/', views.analyze_resume, name='analyze_resume'),
     path('analyze_resume/', views.analyze_resume, name='analyze_resume'),
     path('analyze_resume_v2/', views.analyze_resume_v2, name='analyze_resume_v2'),
+    path("analyze/status/<str:task_id>/", views.analyze_status, name="analyze_status"),
 
 
     path("report/technical/", views.show_report_technical, name="show_report_technical"),
     path("report/non-technical/", views.show_report_nontechnical, name="show_report_nontechnical"),
+    path("report/pdf/", views.download_resume_pdf, name="download_resume_pdf"),
+    path("report/pdf/status/<str:job_id>/", views.download_resume_pdf_status, name="download_resume_pdf_status"),
+    path("report/pdf/<str:job_id>/", views.download_resume_pdf_fetch, name="download_resume_pdf_fetch"),
 
-]
\ No newline at end of file
+]
+
+# Report charts under MEDIA_ROOT; in production the web server serves /media/.
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -5,7 +5,19 @@ import docx2txt
 from collections import OrderedDict
 import base64
 import io
-import matplotlib.pyplot as plt
+
+_plt = None
+
+
+def _get_plt():
+    """Import pyplot (Agg) on the first chart call, not at worker start."""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as p
+        _plt = p
+    return _plt
 
 
 # def extract_text_from_resume(file_path):
@@ -31,14 +43,14 @@ def generate_pie_chart(score_breakdown):
     labels = list(score_breakdown.keys())
     sizes = [data["score"] for data in score_breakdown.values()]
     colors = ['#4CAF50', '#2196F3', '#FF9800', '#dc3545', '#9C27B0', '#00BCD4', '#FFC107', '#795548', '#E91E63', '#607D8B', '#8BC34A']
+    plt = _get_plt()
     fig, ax = plt.subplots()
     ax.pie(sizes, labels=labels, colors=colors[:len(labels)], autopct='%1.1f%%', startangle=140)
     ax.axis('equal')
     buf = io.BytesIO()
     plt.savefig(buf, format='png', bbox_inches="tight", transparent=True)
     plt.close(fig)
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode('utf-8')
+    return base64.b64encode(buf.getbuffer()).decode('ascii')
 
 
 # def ats_scoring_for_non_tech(file_path, applicant_name="Candidate"):
@@ -180,14 +192,17 @@ from collections import OrderedDict
 import re
 from .utils import *
 
-def ats_scoring_non_tech_v2(file_path, applicant_name="Candidate"):
+def ats_scoring_non_tech_v2(file_path, applicant_name="Candidate", text=None):
     """
     New ATS scoring for non-technical resumes using updated 11-criterion model.
     - ATS score = formatting & parsing readiness only
     - Overall score = job match + ATS readiness
+    Pass already-extracted `text` to skip re-reading the file; `file_path`
+    is then only used for its extension.
     """
     # Extract text
-    text = extract_text_from_resume(file_path)
+    if text is None:
+        text = extract_text_from_resume(file_path)
     text_lower = text.lower()
 
     # Detect applicant name from first line (fallback to given)
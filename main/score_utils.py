@@ -2,24 +2,38 @@
 
 from __future__ import annotations
 
+import bisect
+import copy
+import functools
 import io
 import os
 import re
-import json
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-# Light-weight parsers only
-from PyPDF2 import PdfReader
-import docx2txt
+# Parsers (PyMuPDF / PyPDF2 / python-docx) are imported on first use so
+# Django workers don't pay for them at boot; see _pdf_backend().
+_PDF_BACKEND: Optional[Tuple[str, Any]] = None
+
+def _pdf_backend() -> Tuple[str, Any]:
+    global _PDF_BACKEND
+    if _PDF_BACKEND is None:
+        try:  # PyMuPDF is ~10x faster than PyPDF2; fall back if the wheel is missing
+            import fitz
+            _PDF_BACKEND = ("fitz", fitz)
+        except ImportError:
+            from PyPDF2 import PdfReader
+            _PDF_BACKEND = ("pypdf2", PdfReader)
+    return _PDF_BACKEND
 
 # --- Config (env, no hard-coded secrets) ---
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "").strip()
+# Token is frozen at import, so the headers are too (treat as read-only)
+_GITHUB_HEADERS: Dict[str, str] = {"Accept": "application/vnd.github.v3+json", "User-Agent": "applywizz"}
+if GITHUB_TOKEN:  # Only add Authorization if a token is present
+    _GITHUB_HEADERS["Authorization"] = f"token {GITHUB_TOKEN}"
+
 def _github_headers() -> Dict[str, str]:
-    # Only add Authorization if a token is present
-    h = {"Accept": "application/vnd.github.v3+json", "User-Agent": "applywizz"}
-    if GITHUB_TOKEN:
-        h["Authorization"] = f"token {GITHUB_TOKEN}"
-    return h
+    return _GITHUB_HEADERS
 
 
 # =========================
@@ -44,61 +58,121 @@ def _readall(file_or_bytes: Any) -> bytes:
     raise TypeError("Unsupported input for _readall()")
 
 def extract_text_from_pdf(file_or_path: Any) -> str:
-    """Fast, pure-Python PDF text via PyPDF2 (no pdfminer/fitz)."""
+    """PDF text via PyMuPDF when available, else pure-Python PyPDF2."""
     try:
         b = _readall(file_or_path)
-        reader = PdfReader(io.BytesIO(b))
+        kind, lib = _pdf_backend()
+        if kind == "fitz":
+            doc = lib.open(stream=b, filetype="pdf")
+            try:
+                return "\n".join(page.get_text("text") for page in doc)
+            finally:
+                doc.close()
+        reader = lib(io.BytesIO(b))
         chunks = []
         for p in reader.pages:
+            if _is_fontless_bulk_page(p):
+                continue
             try:
-                t = p.extract_text() or ""
+                t = p.extract_text()
             except Exception:
-                t = ""
-            if t:
-                chunks.append(t)
+                t = None
+            chunks.append(t or "")
         return "\n".join(chunks)
     except Exception:
         return ""
 
+_FONTLESS_PAGE_LIMIT = 1 << 20  # 1 MB of content stream with no fonts = a scan
+
+def _is_fontless_bulk_page(page: Any) -> bool:
+    """True for huge pages with no /Font resource (image-only scans).
+
+    PyPDF2 would interpret the whole graphics stream only to find no text;
+    resumes are text-first so this is a no-op for them, but it keeps big
+    scanned uploads from pinning a worker.
+    """
+    try:
+        resources = page.get("/Resources")
+        if resources is not None and "/Font" in resources.get_object():
+            return False
+        contents = page.get("/Contents")
+        if contents is None:
+            return False
+        contents = contents.get_object()
+        streams = contents if isinstance(contents, list) else [contents]
+        size = sum(int(st.get_object()["/Length"]) for st in streams)
+        return size > _FONTLESS_PAGE_LIMIT
+    except Exception:
+        return False
+
 def extract_text_from_docx(file_or_path: Any) -> str:
-    """DOCX text with docx2txt (write to temp only if needed)."""
+    """DOCX text with python-docx, read straight from memory (no temp file).
+
+    Same layout as docx2txt: headers, then the body in document order
+    (paragraphs and table cells interleaved), then footers. Resumes often
+    keep the name and contact links in the header.
+    """
     try:
-        if isinstance(file_or_path, str):
-            return docx2txt.process(file_or_path) or ""
-        # docx2txt wants a path; write to a temp
-        data = _readall(file_or_path)
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix=".docx", delete=True) as tmp:
-            tmp.write(data); tmp.flush()
-            return docx2txt.process(tmp.name) or ""
+        from docx import Document
+        doc = Document(io.BytesIO(_readall(file_or_path)))
+        lines: List[str] = []
+        for section in doc.sections:
+            for part in (section.first_page_header, section.header):
+                if not part.is_linked_to_previous:  # linked = no header of its own
+                    lines.extend(_docx_block_lines(part))
+        lines.extend(_docx_block_lines(doc))
+        for section in doc.sections:
+            for part in (section.first_page_footer, section.footer):
+                if not part.is_linked_to_previous:
+                    lines.extend(_docx_block_lines(part))
+        return "\n".join(lines)
     except Exception:
         return ""
 
+def _docx_block_lines(container: Any) -> Iterable[str]:
+    """Paragraph and table-cell text of a document/header/footer, in order."""
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    for item in container.iter_inner_content():
+        if isinstance(item, Paragraph):
+            yield item.text
+        elif isinstance(item, Table):
+            for row in item.rows:
+                for cell in row.cells:
+                    yield cell.text
+
 
 # =========================
 # Link finding & helpers
 # =========================
 
-_URL_RE = r"https?://[^\s\)>\]\"'}]+"
-_EMAIL_RE = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+_URL_RE = re.compile(r"https?://[^\s\)>\]\"'}]+")
+_EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+_GITHUB_RE = re.compile(r"github\.com/([A-Za-z0-9\-]+)", re.I)
+_LEETCODE_RE = re.compile(r"leetcode\.com/(?:u/)?([\w\-]+)", re.I)
 
 def extract_links_from_text(text: str) -> List[str]:
-    return re.findall(_URL_RE, text or "")
+    return _URL_RE.findall(text or "")
 
 def extract_links_from_pdf(file_or_path: Any) -> List[str]:
     """Cheaper: parse text & regex the URLs (no embedded-annotation crawl)."""
     return extract_links_from_text(extract_text_from_pdf(file_or_path))
 
 def extract_applicant_name(resume_text: str) -> str:
-    lines = [ln.strip() for ln in (resume_text or "").splitlines() if ln.strip()]
-    return lines[0] if lines else "Applicant Name Not Found"
+    # Stop at the first non-empty line instead of stripping the whole document
+    for ln in (resume_text or "").splitlines():
+        s = ln.strip()
+        if s:
+            return s
+    return "Applicant Name Not Found"
 
 def extract_github_username(text: str) -> Optional[str]:
-    m = re.search(r"github\.com/([A-Za-z0-9\-]+)", text or "", flags=re.I)
+    m = _GITHUB_RE.search(text or "")
     return m.group(1) if m else None
 
 def extract_leetcode_username(text: str) -> Optional[str]:
-    m = re.search(r"leetcode\.com/(?:u/)?([\w\-]+)", text or "", flags=re.I)
+    m = _LEETCODE_RE.search(text or "")
     return m.group(1) if m else None
 
 
@@ -106,12 +180,11 @@ def extract_leetcode_username(text: str) -> Optional[str]:
 # Light-weight scoring pieces
 # =========================
 
+_GRADE_THRESHOLDS = (50, 70, 85)
+_GRADE_LABELS = ("Poor", "Average", "Good", "Excellent")
+
 def get_grade_tag(score: float | int) -> str:
-    s = float(score)
-    if s >= 85: return "Excellent"
-    if s >= 70: return "Good"
-    if s >= 50: return "Average"
-    return "Poor"
+    return _GRADE_LABELS[bisect.bisect_right(_GRADE_THRESHOLDS, float(score))]
 
 def get_cert_suggestions(domain: str) -> List[str]:
     domain = (domain or "").lower()
@@ -133,6 +206,11 @@ def get_cert_suggestions(domain: str) -> List[str]:
         "AWS Certified Developer – AWS",
     ]
 
+_PORTFOLIO_RE = re.compile(r"\b(netlify|vercel|github\.io|\.me|\.io|\.dev|\.app)\b", re.I)
+_CERT_RE = re.compile(r"\b(certification|certified|certificate|course)\b", re.I)
+_PORTFOLIO_HINTS = ("netlify", "vercel", ".me", ".io", ".dev", ".app")
+_CERT_HINTS = ("certifi", "course")
+
 TECHNICAL_WEIGHTS = {
     "GitHub Profile": 25,
     "LeetCode/DSA Skills": 20,
@@ -151,17 +229,35 @@ def calculate_dynamic_ats_score(
 ) -> Dict[str, Any]:
     """
     Pure-Python, no network required. Uses presence heuristics.
+    Memoized on its inputs; each caller gets its own copy to mutate.
     """
-    extracted_links = extracted_links or []
-    def _has_link(kind: str) -> bool:
-        return any((lk.get("type") or "").lower() == kind.lower() for lk in extracted_links)
-
-    text = resume_text or ""
-    has_github = bool(github_username) or ("github.com" in text.lower())
-    has_lc = bool(leetcode_username) or ("leetcode.com" in text.lower())
-    has_portfolio = bool(re.search(r"\b(netlify|vercel|github\.io|\.me|\.io|\.dev|\.app)\b", text, re.I))
-    has_linkedin = _has_link("LinkedIn") or ("linkedin.com/in/" in text.lower())
-    has_certs = bool(re.search(r"\b(certification|certified|certificate|course)\b", text, re.I))
+    has_linkedin_link = bool(extracted_links) and any(
+        (lk.get("type") or "").lower() == "linkedin" for lk in extracted_links
+    )
+    result = _dynamic_ats_score_cached(
+        resume_text or "",
+        bool(github_username),
+        bool(leetcode_username),
+        has_linkedin_link,
+        domain,
+    )
+    return copy.deepcopy(result)
+
+@functools.lru_cache(maxsize=256)
+def _dynamic_ats_score_cached(
+    text: str,
+    has_github_user: bool,
+    has_lc_user: bool,
+    has_linkedin_link: bool,
+    domain: str,
+) -> Dict[str, Any]:
+    text_lower = text.lower()
+    has_github = has_github_user or ("github.com" in text_lower)
+    has_lc = has_lc_user or ("leetcode.com" in text_lower)
+    # Cheap substring gates first; the regex only confirms word boundaries
+    has_portfolio = any(k in text_lower for k in _PORTFOLIO_HINTS) and bool(_PORTFOLIO_RE.search(text))
+    has_linkedin = has_linkedin_link or ("linkedin.com/in/" in text_lower)
+    has_certs = any(k in text_lower for k in _CERT_HINTS) and bool(_CERT_RE.search(text))
 
     sections: Dict[str, Dict[str, Any]] = {}
 
@@ -203,15 +299,39 @@ def calculate_dynamic_ats_score(
 # ATS subscore helpers (no heavy deps)
 # =========================
 
+_NUM_BULLET_RE = re.compile(r"\n\d+\.")  # "•"/"-" bullets are plain str.count
+_QUANT_RE = re.compile(r"\b\d+(\.\d+)?%?|\b(k|m|bn)\b", re.I)
+_COMPANY_WORDS = ("company", "employer", "experience")
+_TOKEN_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9\+\#\.\-]{1,20}")
+_UNIQUE_TOKEN_CAP = 15 * 50
+# One alternation instead of a findall per verb: a single scan over the resume
+_ACTION_VERB_RE = re.compile(
+    r"(?:^|\n|•|\-)\s*(?:led|built|created|designed|implemented|developed|optimized"
+    r"|increased|reduced|launched|migrated|improved|delivered)\b",
+    re.I,
+)
+
 def normalize_text(t: str) -> str:
-    return re.sub(r"\s+", " ", (t or "")).strip().lower()
+    # str.split() with no args is a single C loop over all Unicode whitespace
+    return " ".join((t or "").split()).lower()
 
 def keyword_match_rate(text: str, target_keywords: List[str]) -> float:
     if not target_keywords: return 0.0
-    t = normalize_text(text)
-    hits = sum(1 for kw in target_keywords if kw.lower() in t)
+    return _keyword_match_rate_norm(normalize_text(text), [kw.lower() for kw in target_keywords])
+
+def _keyword_match_rate_norm(t: str, target_keywords: Iterable[str]) -> float:
+    """Same as keyword_match_rate, but `t` is normalize_text()'d and keywords are lowercase."""
+    target_keywords = tuple(target_keywords)
+    if not target_keywords: return 0.0
+    hits = len(set(_kw_pattern(target_keywords).findall(t)))
     return hits / max(1, len(target_keywords))
 
+@functools.lru_cache(maxsize=32)
+def _kw_pattern(kws: Tuple[str, ...]) -> "re.Pattern[str]":
+    # Longest first so e.g. "react native" wins over "react" at the same offset
+    alts = sorted(set(kws), key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, alts)) + r")\b")
+
 ROLE_KEYWORDS = {
     "software engineer": ["python","java","javascript","react","node","docker","kubernetes","microservices","rest","graphql","aws","gcp","ci/cd","unit testing"],
     "data scientist": ["python","pandas","numpy","sklearn","tensorflow","pytorch","nlp","cv","statistics","sql","experiment","a/b testing","data visualization"],
@@ -225,31 +345,44 @@ ROLE_KEYWORDS = {
     "customer service": ["crm","zendesk","freshdesk","sla","csat","ticketing","call handling","escalation","knowledge base","communication"],
 }
 
+# Precomputed once at import: lowercase keyword tuples + role titles in scan order
+_ROLE_KEYWORDS_LOWER = {role: tuple(k.lower() for k in kws) for role, kws in ROLE_KEYWORDS.items()}
+_ROLE_TITLES = tuple(ROLE_KEYWORDS)
+
+@functools.lru_cache(maxsize=64)
+def _role_for_title(title_lower: str) -> Optional[str]:
+    return next((rk for rk in _ROLE_TITLES if rk in title_lower), None)
+
 def derive_resume_metrics(resume_text: str, role_title: str) -> Dict[str, Any]:
     t = normalize_text(resume_text)
     sections_present = any(k in t for k in ["experience","work history"]) and ("education" in t) and ("skills" in t)
     single_column = True
     text_extractable = len(t) > 0
 
-    action_verbs = ["led","built","created","designed","implemented","developed","optimized","increased","reduced","launched","migrated","improved","delivered"]
-    av_hits = sum(len(re.findall(rf"(^|\n|•|\-)\s*({v})\b", resume_text, flags=re.I)) for v in action_verbs)
-    bullets = max(1, len(re.findall(r"(\n•|\n-|\n\d+\.)", resume_text)))
+    av_hits = len(_ACTION_VERB_RE.findall(resume_text))
+    bullets = max(1, resume_text.count("\n•") + resume_text.count("\n-")
+                  + len(_NUM_BULLET_RE.findall(resume_text)))
     av_per_bullet = min(1.0, av_hits / bullets)
 
-    quant_ratio = min(1.0, len(re.findall(r"\b\d+(\.\d+)?%?|\b(k|m|bn)\b", resume_text, flags=re.I)) / max(1, bullets))
+    quant_ratio = min(1.0, len(_QUANT_RE.findall(resume_text)) / max(1, bullets))
 
     pages = max(1, round(len(resume_text) / 2000))
-    avg_bullets_per_job = min(12.0, bullets / max(1, len(re.findall(r"\b(company|employer|experience)\b", t))))
+    avg_bullets_per_job = min(12.0, bullets / max(1, sum(t.count(w) for w in _COMPANY_WORDS)))
 
-    base_role = next((rk for rk in ROLE_KEYWORDS if rk in (role_title or "").lower()), None)
-    kws = ROLE_KEYWORDS.get(base_role, [])
-    kmr = keyword_match_rate(resume_text, kws) if kws else 0.0
+    base_role = _role_for_title((role_title or "").lower())
+    kws = _ROLE_KEYWORDS_LOWER.get(base_role, ())
+    kmr = _keyword_match_rate_norm(t, kws) if kws else 0.0
 
     repetition_rate = 0.08 if "responsible for" not in t else 0.18
     jargon_rate = 0.12 if "synergy" not in t and "leverage" not in t else 0.22
 
-    unique_skills_count = len(set(re.findall(r"[a-zA-Z][a-zA-Z0-9\+\#\.\-]{1,20}", resume_text))) // 50
-    unique_skills_count = max(0, min(unique_skills_count, 15))
+    # Clamped to 15 below (= 750 unique tokens), so stop scanning once we get there.
+    seen_tokens = set()
+    for m in _TOKEN_RE.finditer(resume_text):
+        seen_tokens.add(m.group())
+        if len(seen_tokens) >= _UNIQUE_TOKEN_CAP:
+            break
+    unique_skills_count = max(0, min(len(seen_tokens) // 50, 15))
 
     return {
         "sections_present": sections_present,
@@ -265,39 +398,41 @@ def derive_resume_metrics(resume_text: str, role_title: str) -> Dict[str, Any]:
         "unique_skills_count": unique_skills_count,
     }
 
-def ats_resume_scoring(metrics: Dict[str, Any]) -> Dict[str, Any]:
-    b: Dict[str, Any] = {"items": []}
-    total = 0
-    MAX_ATS = 15
-
-    pts_layout = int(bool(metrics.get("sections_present"))) + int(bool(metrics.get("single_column"))) + int(bool(metrics.get("text_extractable")))
-    b["items"].append({"name": "ATS-friendly layout & structure", "earned": pts_layout, "max": 3})
-    total += pts_layout
-
-    av = float(metrics.get("action_verbs_per_bullet", 0.0))
-    qr = float(metrics.get("quantified_bullets_ratio", 0.0))
+_ATS_ITEMS: Tuple[Tuple[str, int], ...] = (
+    ("ATS-friendly layout & structure", 3),
+    ("Action verbs & quantified results", 4),
+    ("Job-relevant keyword alignment", 3),
+    ("Brevity & conciseness", 2),
+    ("Minimal jargon / repetition", 3),
+)
+
+def _score_kernel(
+    layout_flags: int, av: float, qr: float, kmr: float,
+    pages: int, avg_bullets: float, rep: float, jar: float, usk: int,
+) -> Tuple[int, int, int, int, int]:
+    """Scalar-only core of ats_resume_scoring: points per _ATS_ITEMS entry."""
     pts_actions = (2 if av >= 0.8 else 1 if av >= 0.5 else 0) + (2 if qr >= 0.6 else 1 if qr >= 0.3 else 0)
-    b["items"].append({"name": "Action verbs & quantified results", "earned": pts_actions, "max": 4})
-    total += pts_actions
-
-    kmr = float(metrics.get("keyword_match_rate", 0.0))
     pts_keywords = 3 if kmr >= 0.75 else 2 if kmr >= 0.5 else 1 if kmr >= 0.3 else 0
-    b["items"].append({"name": "Job-relevant keyword alignment", "earned": pts_keywords, "max": 3})
-    total += pts_keywords
-
-    pages = int(metrics.get("pages", 2))
-    avg_bullets = float(metrics.get("avg_bullets_per_job", 6.0))
     pts_brev = (1 if pages <= 2 else 0) + (1 if avg_bullets <= 7 else 0)
-    b["items"].append({"name": "Brevity & conciseness", "earned": pts_brev, "max": 2})
-    total += pts_brev
-
-    rep = float(metrics.get("repetition_rate", 0.15))
-    jar = float(metrics.get("jargon_rate", 0.2))
-    usk = int(metrics.get("unique_skills_count", 8))
     pts_clean = (1 if rep <= 0.10 else 0) + (1 if jar <= 0.15 else 0) + (1 if usk >= 8 else 0)
-    b["items"].append({"name": "Minimal jargon / repetition", "earned": pts_clean, "max": 3})
-    total += pts_clean
+    return layout_flags, pts_actions, pts_keywords, pts_brev, pts_clean
 
-    b["subtotal"] = {"earned": total, "max": MAX_ATS}
-    b["score_100"] = int(round((total / MAX_ATS) * 100))
-    return b
+def ats_resume_scoring(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    MAX_ATS = 15
+    pts = _score_kernel(
+        int(bool(metrics.get("sections_present"))) + int(bool(metrics.get("single_column"))) + int(bool(metrics.get("text_extractable"))),
+        float(metrics.get("action_verbs_per_bullet", 0.0)),
+        float(metrics.get("quantified_bullets_ratio", 0.0)),
+        float(metrics.get("keyword_match_rate", 0.0)),
+        int(metrics.get("pages", 2)),
+        float(metrics.get("avg_bullets_per_job", 6.0)),
+        float(metrics.get("repetition_rate", 0.15)),
+        float(metrics.get("jargon_rate", 0.2)),
+        int(metrics.get("unique_skills_count", 8)),
+    )
+    total = sum(pts)
+    return {
+        "items": [{"name": name, "earned": earned, "max": mx} for (name, mx), earned in zip(_ATS_ITEMS, pts)],
+        "subtotal": {"earned": total, "max": MAX_ATS},
+        "score_100": int(round((total / MAX_ATS) * 100)),
+    }
@@ -0,0 +1,61 @@
+import math
+from html import escape
+
+# Matplotlib's default cycle, so charts look the same as before the switch.
+PALETTE = (
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+)
+BACKGROUND = "#121212"
+
+SIZE = 800          # viewBox width
+PIE_BOX = (150, 30, 650, 530)
+LEGEND_TOP = 570
+
+
+def _wedge(cx: float, cy: float, r: float, a0: float, a1: float) -> str:
+    """SVG path for a slice between a0 and a1 degrees, counter-clockwise from 3 o'clock."""
+    x0, y0 = cx + r * math.cos(math.radians(a0)), cy - r * math.sin(math.radians(a0))
+    x1, y1 = cx + r * math.cos(math.radians(a1)), cy - r * math.sin(math.radians(a1))
+    large = 1 if a1 - a0 > 180 else 0
+    return f"M{cx:g},{cy:g} L{x0:.2f},{y0:.2f} A{r:g},{r:g} 0 {large} 0 {x1:.2f},{y1:.2f} Z"
+
+
+def render_pie_svg(labels, sizes) -> str | None:
+    """
+    Pie (dark background, legend two per row at the bottom) as inline SVG
+    markup: a few KB, and it stays sharp at any size. None when there is nothing to draw.
+    """
+    total = float(sum(sizes))
+    if not sizes or total <= 0:
+        return None
+
+    left, top, right, bottom = PIE_BOX
+    cx, cy, r = (left + right) / 2, (top + bottom) / 2, (right - left) / 2
+    rows = (len(labels) + 1) // 2
+    height = LEGEND_TOP + 30 + rows * 34 + 10
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {SIZE} {height}" '
+        f'role="img" aria-label="Pie Chart" style="max-width:100%;height:auto;">',
+        f'<rect width="100%" height="100%" fill="{BACKGROUND}"/>',
+    ]
+    start = 0.0
+    for i, size in enumerate(sizes):
+        end = start + 360.0 * size / total
+        color = PALETTE[i % len(PALETTE)]
+        if end - start >= 359.999:
+            parts.append(f'<circle cx="{cx:g}" cy="{cy:g}" r="{r:g}" fill="{color}"/>')
+        elif end > start:
+            parts.append(f'<path d="{_wedge(cx, cy, r, start, end)}" fill="{color}"/>')
+        start = end
+
+    font = 'font-family="DejaVu Sans, Arial, sans-serif" fill="white"'
+    parts.append(f'<text x="{SIZE // 2}" y="{LEGEND_TOP + 13}" text-anchor="middle" font-size="13" {font}>Categories</text>')
+    for i, label in enumerate(labels):
+        x = (i % 2) * (SIZE // 2) + 60
+        y = LEGEND_TOP + 30 + (i // 2) * 34
+        parts.append(f'<rect x="{x}" y="{y + 4}" width="28" height="18" fill="{PALETTE[i % len(PALETTE)]}"/>')
+        parts.append(f'<text x="{x + 38}" y="{y + 19}" font-size="18" {font}>{escape(str(label))}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
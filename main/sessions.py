@@ -0,0 +1,34 @@
+"""
+Cache session engine that stores Django's signed, zlib-compressed session
+encoding instead of a pickled dict. The stock cache backend skips
+SessionBase.encode(), so report contexts (score breakdowns, suggestions,
+links, chart markup) went to Redis uncompressed on every save.
+
+SESSION_ENGINE = "main.sessions"
+"""
+from django.contrib.sessions.backends.base import CreateError, UpdateError
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+
+
+class SessionStore(CacheSessionStore):
+    def load(self):
+        data = super().load()
+        # str = our encoding; a dict can only be a session written by the stock engine
+        return self.decode(data) if isinstance(data, str) else data
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        if must_create:
+            func = self._cache.add
+        elif self._cache.get(self.cache_key) is not None:
+            func = self._cache.set
+        else:
+            raise UpdateError
+        result = func(
+            self.cache_key,
+            self.encode(self._get_session(no_load=must_create)),
+            self.get_expiry_age(),
+        )
+        if must_create and not result:
+            raise CreateError
@@ -0,0 +1,119 @@
+"""
+Background jobs. Celery is optional: without it (or without a broker) the
+views run the same builders synchronously.
+"""
+import base64
+import io
+import logging
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    from celery import shared_task
+except ImportError:  # pragma: no cover - celery not installed
+    shared_task = None
+
+logger = logging.getLogger(__name__)
+
+REPORT_TTL_SECONDS = 3600
+PDF_TTL_SECONDS = 3600
+
+
+def run_analyze_tech(resume_b64: str, ext: str, fields: dict) -> str:
+    """
+    Build the technical report context and park it in the cache under
+    report:<result_key>. Returns the result key for show_report_technical.
+    The resume travels base64-encoded since the JSON serializer can't carry bytes.
+    """
+    from .views import build_technical_context  # views imports this module
+
+    buf = io.BytesIO(base64.b64decode(resume_b64))
+    buf.name = f"resume{ext}"
+    context = build_technical_context(buf, ext, fields)
+    key = context["result_key"]
+    cache.set(f"report:{key}", context, REPORT_TTL_SECONDS)
+    # Same gate as the sync path: a separate job, so the result key (and the
+    # report) isn't held up by WeasyPrint.
+    if getattr(settings, "PDF_ASYNC", False) and prerender_report_pdf_task is not None:
+        prerender_report_pdf_task.delay(context)
+    return key
+
+
+run_analyze_tech_task = shared_task(run_analyze_tech) if shared_task else None
+
+
+def send_otp_email(to_email: str, otp: str, subject: str) -> None:
+    from .views import send_otp_email as _send
+
+    _send(to_email, otp, subject)
+
+
+send_otp_email_task = shared_task(send_otp_email) if shared_task else None
+
+
+def render_resume_pdf(context: dict, template_path: str, job_id: str) -> str:
+    """Render the report PDF to <PDF_DIR>/resume_report_<job_id>.pdf and return that path."""
+    from .views import render_report_pdf
+
+    pdf_dir = getattr(settings, "PDF_DIR", "") or tempfile.gettempdir()
+    sweep_stale_pdfs(pdf_dir)
+    path = os.path.join(pdf_dir, f"resume_report_{job_id}.pdf")
+    render_report_pdf(context, template_path, path)
+    return path
+
+
+render_resume_pdf_task = shared_task(render_resume_pdf) if shared_task else None
+
+
+def sweep_stale_pdfs(pdf_dir: str) -> None:
+    """Delete rendered PDFs older than PDF_TTL_SECONDS (never fetched, or served by nginx)."""
+    cutoff = time.time() - PDF_TTL_SECONDS
+    try:
+        entries = list(os.scandir(pdf_dir))
+    except OSError:
+        return
+    for entry in entries:
+        if not (entry.name.startswith("resume_report_") and entry.name.endswith(".pdf")):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def sweep_stale_charts(max_age_seconds: int) -> None:
+    """Delete charts/*.png in default storage (MEDIA_ROOT or S3) older than max_age_seconds."""
+    from django.core.files.storage import default_storage
+    from django.utils import timezone
+
+    cutoff = timezone.now() - timedelta(seconds=max_age_seconds)
+    try:
+        _, files = default_storage.listdir("charts")
+    except (OSError, NotImplementedError):
+        return
+    for fname in files:
+        name = f"charts/{fname}"
+        try:
+            if default_storage.get_modified_time(name) < cutoff:
+                default_storage.delete(name)
+        except (OSError, NotImplementedError):
+            pass
+
+
+def prerender_report_pdf(context: dict, kind: str = "tech") -> None:
+    """Render + cache the report PDF right after analysis so the download is instant."""
+    from .views import cache_report_pdf
+
+    try:
+        cache_report_pdf(context, kind)
+    except Exception:  # best effort: download_resume_pdf renders on a miss
+        logger.exception("PDF pre-render failed")
+
+
+prerender_report_pdf_task = shared_task(prerender_report_pdf) if shared_task else None
@@ -1,3 +1,349 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from main import score_utils, tasks, utils, views
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+LINKS_PDF = FIXTURES / "resume_links.pdf"  # text URL + email, plus a URI annotation on "Portfolio"
+
+HR_RESUME = """Priya Sharma
+HR Generalist | priya.sharma@example.com | +91 98765 43210
+
+Experience
+Company: Brightpath Staffing (2019-2024)
+• Led recruitment and hiring for 120+ roles across 4 business units
+• Reduced onboarding time by 35% with a new HRMS workflow
+• Managed payroll for 450 employees with zero compliance findings
+- Designed an employee engagement survey; participation up 22%
+- Delivered policy training to 18 managers
+1. Improved grievance resolution time from 9 to 4 days
+2. Launched a performance review calendar adopted company-wide
+
+Education
+MBA, Human Resource Management, 2018
+
+Skills
+Talent acquisition, onboarding, payroll, HRMS, compliance, training
+"""
+
+SWE_RESUME = """Tom Becker
+Backend engineer. Interests: distributed systems, RESTful APIs.
+Skills: JavaScript, TypeScript, Node.js, React, Docker, Kubernetes, AWS, GraphQL, CI/CD
+Experience
+- Built microservices in Python and Go; unit testing with pytest
+"""
+
+
+class ExtractLinksFromPdfTests(SimpleTestCase):
+    def test_path_returns_text_urls_only(self):
+        self.assertEqual(utils.extract_links_from_pdf(str(LINKS_PDF)), ["https://github.com/janedoe"])
+
+    def test_upload_returns_text_urls_only(self):
+        with open(LINKS_PDF, "rb") as f:
+            self.assertEqual(utils.extract_links_from_pdf(f), ["https://github.com/janedoe"])
+            self.assertEqual(f.tell(), 0)
+
+    def test_combined_still_reports_emails(self):
+        links, text = utils.extract_links_combined(str(LINKS_PDF))
+        self.assertIn("https://github.com/janedoe", links)
+        self.assertIn("mailto:jane.doe@example.com", links)
+        self.assertTrue(text.startswith("Jane Doe"))
+
+
+@unittest.skipUnless(utils._HAS_PDFIUM, "pypdfium2 not installed")
+class PdfiumBackendTests(SimpleTestCase):
+    def test_link_annotations_are_enumerated(self):
+        import pypdfium2 as pdfium
+
+        uris = []
+        pdf = pdfium.PdfDocument(str(LINKS_PDF))
+        try:
+            texts = list(utils._pdfium_pages(pdf, uris))
+        finally:
+            pdf.close()
+        self.assertEqual(uris, ["https://janedoe.dev/"])
+        self.assertIn("Portfolio", texts[0])
+
+    def test_annotation_uris_reach_combined_links(self):
+        links, _ = utils.extract_links_combined(io.BytesIO(LINKS_PDF.read_bytes()))
+        self.assertEqual(links[0], "https://janedoe.dev/")
+
+    def test_textless_pdf_is_parsed_once(self):
+        import pypdfium2 as pdfium
+
+        blank = pdfium.PdfDocument.new()
+        blank.new_page(612, 792)
+        buf = io.BytesIO()
+        blank.save(buf)
+        blank.close()
+        buf.seek(0)
+        with mock.patch.object(utils, "_fitz_pages") as fitz_pages, \
+                mock.patch.object(utils, "PdfReader") as reader:
+            self.assertEqual(utils.extract_text_from_pdf(buf), "")
+        fitz_pages.assert_not_called()
+        reader.assert_not_called()
+
+
+class NonTechReportTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _analyze(self):
+        upload = SimpleUploadedFile("resume.pdf", LINKS_PDF.read_bytes(), content_type="application/pdf")
+        return self.client.post(reverse("analyze_resume_v2"), {"domain": "non_technical", "resume": upload})
+
+    def test_context_is_stored_with_result_key(self):
+        response = self._analyze()
+        self.assertRedirects(response, reverse("show_report_nontechnical"), fetch_redirect_response=False)
+        context = self.client.session["resume_context_nontech"]
+        self.assertTrue(context["result_key"])
+        self.assertNotIn("resume_context_tech", self.client.session)
+
+    def test_report_page_revalidates_with_etag(self):
+        self._analyze()
+        key = self.client.session["resume_context_nontech"]["result_key"]
+        response = self.client.get(reverse("show_report_nontechnical"))
+        self.assertEqual(response["ETag"], f'"nontech-{key}"')
+        response = self.client.get(reverse("show_report_nontechnical"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_legacy_doc_is_rejected(self):
+        upload = SimpleUploadedFile("resume.doc", b"\xd0\xcf\x11\xe0", content_type="application/msword")
+        response = self.client.post(reverse("analyze_resume_v2"), {"domain": "non_technical", "resume": upload})
+        self.assertContains(response, "Please upload a PDF or DOCX.", status_code=400)
+
+
+class AnalyzeAsyncTests(TestCase):
+    def setUp(self):
+        task = mock.Mock()
+        task.delay.return_value.id = "task-1"
+        task.AsyncResult.return_value.state = "SUCCESS"
+        task.AsyncResult.return_value.successful.return_value = True
+        task.AsyncResult.return_value.result = "key-1"
+        patcher = mock.patch.object(views, "run_analyze_tech_task", task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cache.clear)
+
+    def _post(self, **headers):
+        upload = SimpleUploadedFile("resume.pdf", LINKS_PDF.read_bytes(), content_type="application/pdf")
+        return self.client.post(reverse("analyze_resume"), {"domain": "technical", "resume": upload}, **headers)
+
+    def _own_task(self):
+        session = self.client.session
+        session["analyze_task"] = "task-1"
+        session.save()
+
+    @override_settings(ANALYZE_ASYNC=True)
+    def test_form_post_stays_synchronous(self):
+        with mock.patch.object(views, "build_technical_context", return_value={"result_key": "key-0"}):
+            response = self._post(HTTP_ACCEPT="text/html,*/*")
+        self.assertRedirects(response, reverse("show_report_technical"), fetch_redirect_response=False)
+        views.run_analyze_tech_task.delay.assert_not_called()
+
+    @override_settings(ANALYZE_ASYNC=True)
+    def test_json_post_is_queued(self):
+        response = self._post(HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status_url"], reverse("analyze_status", args=["task-1"]))
+        self.assertEqual(self.client.session["analyze_task"], "task-1")
+
+    def test_status_requires_own_task(self):
+        response = self.client.get(reverse("analyze_status", args=["task-1"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_status_moves_report_into_session(self):
+        self._own_task()
+        cache.set("report:key-1", {"result_key": "key-1", "role": "Software Engineer"})
+        response = self.client.get(reverse("analyze_status", args=["task-1"]))
+        self.assertEqual(response.json()["report_url"], reverse("show_report_technical"))
+        self.assertEqual(self.client.session["resume_context_tech"]["result_key"], "key-1")
+
+    def test_worker_leaves_pdf_to_its_own_job(self):
+        ctx = {"result_key": "key-2"}
+        job = mock.Mock()
+        with mock.patch.object(views, "build_technical_context", return_value=ctx), \
+                mock.patch.object(tasks, "prerender_report_pdf_task", job), \
+                mock.patch.object(tasks, "prerender_report_pdf") as render:
+            self.assertEqual(tasks.run_analyze_tech("", ".pdf", {}), "key-2")
+            job.delay.assert_not_called()
+            with override_settings(PDF_ASYNC=True):
+                tasks.run_analyze_tech("", ".pdf", {})
+            job.delay.assert_called_once_with(ctx)
+        render.assert_not_called()
+        self.assertEqual(cache.get("report:key-2"), ctx)
+
+    def test_status_reports_expired_result(self):
+        self._own_task()
+        response = self.client.get(reverse("analyze_status", args=["task-1"]))
+        self.assertEqual(response.status_code, 410)
+
+
+class PdfJobTests(TestCase):
+    def setUp(self):
+        self.pdf_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pdf_dir, True)
+        self.path = os.path.join(self.pdf_dir, "resume_report_job-1.pdf")
+        task = mock.Mock()
+        task.AsyncResult.return_value.state = "SUCCESS"
+        task.AsyncResult.return_value.successful.return_value = True
+        task.AsyncResult.return_value.result = self.path
+        patcher = mock.patch.object(views, "render_resume_pdf_task", task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _own_job(self, **extra):
+        session = self.client.session
+        session["pdf_job"] = "job-1"
+        session.update(extra)
+        session.save()
+
+    @override_settings(PDF_ASYNC=True)
+    def test_json_download_is_queued(self):
+        self._own_job(resume_context_nontech={"applicant_name": "Jane"})
+        response = self.client.get(reverse("download_resume_pdf"), HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 202)
+        args = views.render_resume_pdf_task.apply_async.call_args[0][0]
+        self.assertEqual(args[1], "score_of_non_tech_pdf.html")
+
+    def test_other_sessions_cannot_fetch(self):
+        response = self.client.get(reverse("download_resume_pdf_fetch", args=["job-1"]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse("download_resume_pdf_status", args=["job-1"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_fetch_deletes_the_file(self):
+        Path(self.path).write_bytes(b"%PDF-1.7 test")
+        self._own_job()
+        response = self.client.get(reverse("download_resume_pdf_fetch", args=["job-1"]))
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.7 test")
+        response.close()
+        self.assertFalse(os.path.exists(self.path))
+        response = self.client.get(reverse("download_resume_pdf_fetch", args=["job-1"]))
+        self.assertEqual(response.status_code, 410)
+
+    def test_sweep_removes_only_stale_reports(self):
+        stale = Path(self.pdf_dir, "resume_report_old.pdf")
+        fresh = Path(self.pdf_dir, "resume_report_new.pdf")
+        other = Path(self.pdf_dir, "keep.pdf")
+        for p in (stale, fresh, other):
+            p.write_bytes(b"%PDF")
+        old = time.time() - tasks.PDF_TTL_SECONDS - 60
+        os.utime(stale, (old, old))
+        os.utime(other, (old, old))
+        tasks.sweep_stale_pdfs(self.pdf_dir)
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+        self.assertTrue(other.exists())
+
+
+class ChartStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media, SESSION_COOKIE_AGE=3600))
+        cache.delete("charts:sweep")
+
+    def test_stale_charts_are_swept(self):
+        charts = Path(self.media, "charts")
+        charts.mkdir()
+        stale = charts / "old.png"
+        stale.write_bytes(b"png")
+        old = time.time() - 7200
+        os.utime(stale, (old, old))
+        url = views._chart_url("cG5n")  # b"png"
+        self.assertFalse(stale.exists())
+        self.assertTrue(Path(self.media, url.removeprefix("/media/")).exists())
+
+    def test_reused_chart_is_refreshed(self):
+        url = views._chart_url("cG5n")
+        path = Path(self.media, url.removeprefix("/media/"))
+        old = time.time() - 2000  # past half the TTL
+        os.utime(path, (old, old))
+        self.assertEqual(views._chart_url("cG5n"), url)
+        self.assertGreater(path.stat().st_mtime, old)
+
+
+class KeywordMatchRegressionTests(SimpleTestCase):
+    """Keyword hits are word-bounded now; substrings of longer words stopped counting."""
+
+    def test_keyword_match_rate_is_word_bounded(self):
+        kws = score_utils.ROLE_KEYWORDS["software engineer"]
+        # Was 13/14: "java" matched inside "javascript" and "rest" inside "interests"/"restful".
+        self.assertEqual(score_utils.keyword_match_rate(SWE_RESUME, kws), 11 / 14)
+        self.assertEqual(score_utils.keyword_match_rate(HR_RESUME, kws), 0.0)
+
+
+class ResumeMetricsTests(SimpleTestCase):
+    """Company mentions are substring counts now, so inflections count too."""
+
+    def test_avg_bullets_per_job_counts_inflected_company_words(self):
+        text = "Experienced recruiter\nExperience\n- Led hiring\n- Ran payroll\n"
+        # Was 2.0: the \b-bounded regex skipped "experienced" (one mention, not two).
+        for module in (utils, score_utils):
+            with self.subTest(module=module.__name__):
+                self.assertEqual(module.derive_resume_metrics(text, "Human Resources")["avg_bullets_per_job"], 1.0)
+        self.assertEqual(utils.derive_resume_metrics(HR_RESUME, "Human Resources")["avg_bullets_per_job"], 7 / 3)
+
+
+class OtpVerifyTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_non_ascii_otp_is_rejected(self):
+        cache.set("login_otp:jane@example.com", "123456")
+        response = self.client.post(reverse("verify_email_otp"), {"email": "jane@example.com", "otp": "１２３４５６"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "Invalid or expired OTP")
+
+    def test_matching_otp_is_accepted(self):
+        cache.set("signup_otp:jane@example.com:9876543210", "123456")
+        response = self.client.post(reverse("verify_signup_otp"),
+                                    {"email": "jane@example.com", "mobile": "9876543210", "otp": "123456"})
+        self.assertEqual(response.status_code, 200)
+
+
+class DocxTextTests(SimpleTestCase):
+    @staticmethod
+    def _resume_docx() -> bytes:
+        import docx
+
+        doc = docx.Document()
+        section = doc.sections[0]
+        section.header.paragraphs[0].text = "Jane Doe | jane.doe@example.com | https://github.com/janedoe"
+        doc.add_paragraph("Experience")
+        table = doc.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "Acme Corp"
+        table.cell(0, 1).text = "2020-2024"
+        doc.add_paragraph("Education")
+        section.footer.paragraphs[0].text = "linkedin.com/in/janedoe"
+        buf = io.BytesIO()
+        doc.save(buf)
+        return buf.getvalue()
+
+    def test_header_table_and_footer_text_in_document_order(self):
+        text = score_utils.extract_text_from_docx(self._resume_docx())
+        self.assertEqual(text.splitlines(), [
+            "Jane Doe | jane.doe@example.com | https://github.com/janedoe",
+            "Experience",
+            "Acme Corp",
+            "2020-2024",
+            "Education",
+            "linkedin.com/in/janedoe",
+        ])
+        self.assertEqual(score_utils.extract_applicant_name(text).split(" |")[0], "Jane Doe")
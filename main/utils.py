@@ -2,17 +2,32 @@
 
 from __future__ import annotations
 
+import bisect
+import html
 import os
 import re
 import io
+import importlib.util
 import json
+import shutil
 import tempfile
-from typing import Dict, List, Tuple, Optional
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, Optional
 
 import requests
 from PyPDF2 import PdfReader
 import docx2txt
-from bs4 import BeautifulSoup
+
+try:  # optional: one-pass multi-keyword matching (pyahocorasick)
+    import ahocorasick
+except ImportError:  # pragma: no cover
+    ahocorasick = None
+
+try:  # optional: faster JSON decoding straight from bytes (orjson)
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
 
 # ─────────────────────────────────────────────────────────────
 # Weights (keep lightweight, no heavy imports here)
@@ -26,6 +41,41 @@ TECHNICAL_WEIGHTS: Dict[str, int] = {
     "Certifications & Branding": 10,
 }
 
+# ─────────────────────────────────────────────────────────────
+# Precompiled patterns (compiled once at import, reused per request)
+# ─────────────────────────────────────────────────────────────
+_URL_RE = re.compile(r"https?://[^\s)>\]\"'}]+")
+_EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+_HREF_RE = re.compile(r"<a[^>]+href\s*=\s*[\"']([^\"']+)[\"']", re.I)
+_LINK_COMBO_RE = re.compile(
+    r"(?P<url>https?://[^\s\"]+)|(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})"
+)
+_GITHUB_USER_RE = re.compile(r"github\.com/([A-Za-z0-9\-]+)")
+_LEETCODE_USER_RE = re.compile(r"leetcode\.com/(?:u/)?([\w\-]+)")
+_CLASSIFY_PORTFOLIO_RE = re.compile(r"portfolio|netlify|vercel|\.me|\.io|\.dev|\.app", re.I)
+_LINKEDIN_WORD_RE = re.compile(r"linkedin", re.I)
+# Portfolio / LinkedIn / certification presence in one scan. The portfolio
+# branch is a lookahead so it never consumes text the other branches need
+# (e.g. "https://linkedin.com/in/..." or "https://course.com").
+_PRESENCE_RE = re.compile(
+    r"(?=(?P<port>https?://[a-z0-9\-]+\.(?:com|io|dev|app|me|net|in|org)))"
+    r"|(?P<linkedin>linkedin\.com/in/)"
+    r"|(?P<cert>\b(?:certification|certified|course|certificate)\b)",
+    re.I,
+)
+_WS_RE = re.compile(r"\s+")
+_NUM_BULLET_RE = re.compile(r"\n\d+\.")  # "•"/"-" bullets are plain str.count
+_QUANT_RE = re.compile(r"\b\d+(\.\d+)?%?|\b(k|m|bn)\b", re.I)
+_COMPANY_WORDS = ("company", "employer", "experience")
+_TOKEN_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9\+\#\.\-]{1,20}")
+_UNIQUE_TOKEN_CAP = 15 * 50
+_ACTION_VERB_RE = re.compile(
+    r"(?:^|\n|•|-)\s*(?:led|built|created|designed|implemented|developed|optimized"
+    r"|increased|reduced|launched|migrated|improved|delivered)\b",
+    re.I,
+)
+
+
 # ─────────────────────────────────────────────────────────────
 # GitHub API (no hard-coded token; use env if present)
 # ─────────────────────────────────────────────────────────────
@@ -40,22 +90,108 @@ def _github_headers() -> Dict[str, str]:
 # ─────────────────────────────────────────────────────────────
 # Basic text extraction (PDF/DOCX)
 # ─────────────────────────────────────────────────────────────
+MAX_PAGES = 10
+MAX_TEXT_CHARS = 200_000
+
+# Fastest available backend wins: PDFium, then PyMuPDF, then PyPDF2.
+_HAS_PDFIUM = importlib.util.find_spec("pypdfium2") is not None
+_HAS_FITZ = importlib.util.find_spec("fitz") is not None
+
+
+def _join_pages_capped(page_texts: Iterable[str]) -> str:
+    """Join lazily-extracted page texts, stopping at MAX_PAGES / MAX_TEXT_CHARS."""
+    parts: List[str] = []
+    total = 0
+    for i, t in enumerate(page_texts):
+        if i >= MAX_PAGES:
+            break
+        t = t or ""
+        parts.append(t)
+        total += len(t)
+        if total >= MAX_TEXT_CHARS:
+            break
+    return "\n".join(parts)
+
+
+def _pdfium_pages(pdf, uris: Optional[List[str]]):
+    """Yield page texts (and collect link URIs) from an open PdfDocument."""
+    import ctypes
+    import pypdfium2.raw as pdfium_c
+
+    for page in pdf:
+        textpage = page.get_textpage()
+        try:
+            if uris is not None:
+                pos, link = ctypes.c_int(0), pdfium_c.FPDF_LINK()
+                while pdfium_c.FPDFLink_Enumerate(page, ctypes.byref(pos), ctypes.byref(link)):
+                    action = pdfium_c.FPDFLink_GetAction(link)
+                    n = pdfium_c.FPDFAction_GetURIPath(pdf, action, None, 0) if action else 0
+                    if n > 1:
+                        buf = ctypes.create_string_buffer(n)
+                        pdfium_c.FPDFAction_GetURIPath(pdf, action, buf, n)
+                        uris.append(buf.value.decode("utf-8", "replace"))
+            yield textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+
+
+def _fitz_pages(doc, uris: Optional[List[str]]):
+    for page in doc:
+        if uris is not None:
+            uris.extend(l["uri"] for l in page.get_links() if l.get("uri"))
+        yield page.get_text("text")
+
+
+def _pdf_text_and_uris(file_obj_or_path, uris: Optional[List[str]] = None) -> str:
+    """
+    Page-capped text extraction; link-annotation URIs are appended to `uris`
+    when given (PDFium / PyMuPDF only). The first backend that opens the
+    document wins, even with no text, so a scanned upload is parsed once.
+    """
+    is_path = isinstance(file_obj_or_path, (str, bytes, os.PathLike))
+    if is_path:
+        src = file_obj_or_path
+    else:
+        src = file_obj_or_path.read()
+        file_obj_or_path.seek(0)
+
+    if _HAS_PDFIUM:
+        import pypdfium2 as pdfium
+
+        try:
+            pdf = pdfium.PdfDocument(src)
+        except Exception:
+            pdf = None
+        if pdf is not None:
+            try:
+                return _join_pages_capped(_pdfium_pages(pdf, uris))
+            finally:
+                pdf.close()
+
+    if _HAS_FITZ:
+        import fitz
+
+        try:
+            doc = fitz.open(src) if is_path else fitz.open(stream=src, filetype="pdf")
+        except Exception:
+            doc = None
+        if doc is not None:
+            with doc:
+                return _join_pages_capped(_fitz_pages(doc, uris))
+
+    reader = PdfReader(src if is_path else io.BytesIO(src))
+    return _join_pages_capped(page.extract_text() for page in reader.pages)
+
+
 def extract_text_from_pdf(file_obj_or_path) -> str:
     """
     Accepts a Django InMemoryUploadedFile, file-like, or a filesystem path.
-    Uses PyPDF2 only (lightweight).
+    PDFium / PyMuPDF fast paths when available, PyPDF2 otherwise; capped at
+    MAX_PAGES / MAX_TEXT_CHARS so huge or scanned uploads bail out early.
     """
     try:
-        if isinstance(file_obj_or_path, (str, bytes, os.PathLike)):
-            with open(file_obj_or_path, "rb") as f:
-                reader = PdfReader(f)
-                return "\n".join(
-                    (page.extract_text() or "") for page in reader.pages
-                )
-        else:
-            # file-like (e.g., InMemoryUploadedFile)
-            reader = PdfReader(file_obj_or_path)
-            return "\n".join((page.extract_text() or "") for page in reader.pages)
+        return _pdf_text_and_uris(file_obj_or_path)
     except Exception:
         return ""
 
@@ -67,13 +203,16 @@ def extract_text_from_docx(file_obj_or_path) -> str:
     try:
         if isinstance(file_obj_or_path, (str, bytes, os.PathLike)):
             return docx2txt.process(file_obj_or_path)
-        # Write uploaded file to temp and process
-        with tempfile.NamedTemporaryFile(delete=True, suffix=".docx") as tmp:
-            chunk = file_obj_or_path.read()
-            file_obj_or_path.seek(0)
-            tmp.write(chunk)
-            tmp.flush()
-            return docx2txt.process(tmp.name)
+        # Stream the upload to a temp file (closed before docx2txt reopens it,
+        # which Windows requires), then always clean it up.
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
+            shutil.copyfileobj(file_obj_or_path, tmp, length=64 * 1024)
+            tmp_path = tmp.name
+        file_obj_or_path.seek(0)
+        try:
+            return docx2txt.process(tmp_path)
+        finally:
+            os.unlink(tmp_path)
     except Exception:
         return ""
 
@@ -84,22 +223,29 @@ def extract_applicant_name(resume_text: str) -> str:
     """
     if not resume_text:
         return "Applicant Name Not Found"
-    for line in (l.strip() for l in resume_text.splitlines()):
+    # Walk newlines with str.find instead of splitting the whole document.
+    start, n = 0, len(resume_text)
+    while start < n:
+        end = resume_text.find("\n", start)
+        line = resume_text[start:end if end != -1 else n].strip()
         if line:
             return line
+        if end == -1:
+            break
+        start = end + 1
     return "Applicant Name Not Found"
 
 
 # ─────────────────────────────────────────────────────────────
-# Link extraction (no PyMuPDF; parse text only)
+# Link extraction
 # ─────────────────────────────────────────────────────────────
 def extract_links_from_pdf(file_obj_or_path) -> List[str]:
     """
-    Extract URLs from PDF text (annotations not included, to stay light).
+    Extract URLs from PDF text (annotations and emails not included).
+    Shares the parse with extract_links_combined but keeps the text-only result.
     """
-    text = extract_text_from_pdf(file_obj_or_path)
-    url_pattern = r"https?://[^\s)>\]\"'}]+"
-    return re.findall(url_pattern, text or "")
+    _, text = extract_links_combined(file_obj_or_path)
+    return _URL_RE.findall(text)
 
 
 def extract_and_identify_links(text: str) -> List[Dict[str, Optional[str]]]:
@@ -107,67 +253,94 @@ def extract_and_identify_links(text: str) -> List[Dict[str, Optional[str]]]:
     Extract URLs, emails, and <a href> from HTML-ish text and classify.
     """
     links: List[Dict[str, Optional[str]]] = []
-
-    url_pattern = r"https?://[^\s\"]+"
-    email_pattern = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
-
-    found_urls = re.findall(url_pattern, text or "")
-    found_emails = re.findall(email_pattern, text or "")
+    text = text or ""
+    seen: set = set()  # dedupe across URLs, emails and anchors
+    has_linkedin = False
 
     def _classify(u: str) -> str:
         if "github.com" in u:
             return "GitHub"
         if "linkedin.com" in u:
             return "LinkedIn"
-        if re.search(r"portfolio|netlify|vercel|\.me|\.io|\.dev|\.app", u, re.I):
+        if _CLASSIFY_PORTFOLIO_RE.search(u):
             return "Portfolio"
         if u.startswith("mailto:"):
             return "Email"
         return "Other"
 
-    for u in found_urls:
-        links.append({"url": u, "type": _classify(u)})
-
-    for e in found_emails:
-        links.append({"url": f"mailto:{e}", "type": "Email"})
+    def _add(u: str, u_type: str) -> None:
+        nonlocal has_linkedin
+        if u in seen:
+            return
+        seen.add(u)
+        if u_type == "LinkedIn":
+            has_linkedin = True
+        links.append({"url": u, "type": u_type})
+
+    # One scan for URLs and emails; URLs are listed before emails as before.
+    emails: List[str] = []
+    for m in _LINK_COMBO_RE.finditer(text):
+        if m.lastgroup == "url":
+            u = m.group("url")
+            _add(u, _classify(u))
+        else:
+            emails.append(m.group("email"))
+    for e in emails:
+        _add(f"mailto:{e}", "Email")
 
-    # Parse HTML anchors
-    soup = BeautifulSoup(text or "", "html.parser")
-    existing = {d["url"] for d in links if d.get("url")}
-    for tag in soup.find_all("a", href=True):
-        href = tag["href"]
-        if href not in existing:
-            links.append({"url": href, "type": _classify(href)})
-            existing.add(href)
+    # <a href> targets (skipped entirely for plain-text resumes)
+    if "<a" in text or "<A" in text:
+        for href in _HREF_RE.findall(text):
+            href = html.unescape(href)
+            _add(href, _classify(href))
 
     # Inferred LinkedIn mention
-    if re.search(r"linkedin", text or "", re.I):
-        if not any(d.get("type") == "LinkedIn" for d in links):
-            links.append({"url": None, "type": "LinkedIn (Inferred)"})
+    if not has_linkedin and _LINKEDIN_WORD_RE.search(text):
+        links.append({"url": None, "type": "LinkedIn (Inferred)"})
 
     return links
 
 
-def extract_links_combined(pdf_path: str) -> Tuple[List[str], str]:
+def _links_and_text(pdf_src) -> Tuple[List[str], str]:
+    uris: List[str] = []
+    try:
+        full_text = _pdf_text_and_uris(pdf_src, uris) or ""
+    except Exception:
+        return [], ""
+    found_urls = _URL_RE.findall(full_text)
+    found_emails = [f"mailto:{e}" for e in _EMAIL_RE.findall(full_text)]
+    return list(dict.fromkeys(uris + found_urls + found_emails)), full_text  # dedupe, keep order
+
+
+@lru_cache(maxsize=32)
+def _links_combined_for_file(path: str, mtime_ns: int, size: int) -> Tuple[Tuple[str, ...], str]:
+    # mtime/size are part of the key so a rewritten file is re-parsed.
+    links, full_text = _links_and_text(path)
+    return tuple(links), full_text
+
+
+def extract_links_combined(pdf_path) -> Tuple[List[str], str]:
     """
-    Lightweight variant: read PDF text with PyPDF2 and parse URLs from text.
-    Returns (links, full_text). No annotation scanning (keeps deps small).
+    Read PDF text and links in one parse: link-annotation URIs (PDFium /
+    PyMuPDF) plus URLs and emails found in the text. Returns (links, full_text).
+    Filesystem paths are cached on (path, mtime, size).
     """
-    full_text = extract_text_from_pdf(pdf_path) or ""
-    url_pattern = r"https?://[^\s)>\]\"'}]+"
-    email_pattern = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+    if isinstance(pdf_path, (str, os.PathLike)):
+        try:
+            st = os.stat(pdf_path)
+        except OSError:
+            return [], ""
+        links, full_text = _links_combined_for_file(os.fspath(pdf_path), st.st_mtime_ns, st.st_size)
+        return list(links), full_text
 
-    found_urls = re.findall(url_pattern, full_text)
-    found_emails = [f"mailto:{e}" for e in re.findall(email_pattern, full_text)]
-
-    return list(dict.fromkeys(found_urls + found_emails)), full_text  # dedupe, keep order
+    return _links_and_text(pdf_path)
 
 
 # ─────────────────────────────────────────────────────────────
 # Profile lookups
 # ─────────────────────────────────────────────────────────────
 def extract_github_username(text: str) -> Optional[str]:
-    m = re.search(r"github\.com/([A-Za-z0-9\-]+)", text or "")
+    m = _GITHUB_USER_RE.search(text or "")
     return m.group(1) if m else None
 
 
@@ -178,7 +351,7 @@ def get_github_repo_count(username: str) -> int:
     try:
         r = requests.get(url, headers=_github_headers(), timeout=10)
         if r.status_code == 200:
-            return int(r.json().get("public_repos", 0))
+            return int(_json_loads(r.content).get("public_repos", 0))
     except Exception:
         pass
     return 0
@@ -188,7 +361,7 @@ def extract_leetcode_username(text: str) -> Optional[str]:
     """
     Accepts both styles: leetcode.com/u/username OR leetcode.com/username
     """
-    m = re.search(r"leetcode\.com/(?:u/)?([\w\-]+)", text or "")
+    m = _LEETCODE_USER_RE.search(text or "")
     return m.group(1) if m else None
 
 
@@ -199,7 +372,7 @@ def fetch_leetcode_problem_count(username: str) -> int:
     try:
         res = requests.get(f"{base}{username}", timeout=10)
         if res.status_code == 200:
-            return int(res.json().get("totalSolved", 0))
+            return int(_json_loads(res.content).get("totalSolved", 0))
     except Exception:
         pass
     return 0
@@ -208,15 +381,12 @@ def fetch_leetcode_problem_count(username: str) -> int:
 # ─────────────────────────────────────────────────────────────
 # Scoring helpers (light logic only)
 # ─────────────────────────────────────────────────────────────
+_GRADE_THRESHOLDS = (50, 70, 85)
+_GRADE_LABELS = ("Poor", "Average", "Good", "Excellent")
+
+
 def get_grade_tag(score: float | int) -> str:
-    s = float(score or 0)
-    if s >= 85:
-        return "Excellent"
-    if s >= 70:
-        return "Good"
-    if s >= 50:
-        return "Average"
-    return "Poor"
+    return _GRADE_LABELS[bisect.bisect_right(_GRADE_THRESHOLDS, float(score or 0))]
 
 
 def get_cert_suggestions(domain: str) -> List[str]:
@@ -239,6 +409,59 @@ def get_cert_suggestions(domain: str) -> List[str]:
     ]
 
 
+# Below this many characters there is no resume worth scoring.
+_MIN_RESUME_CHARS = 32
+
+# Static sub-criteria (shared, read-only; callers never mutate them)
+_GH_CRIT_PRESENT = (
+    # small pseudo-criteria to avoid network calls
+    {"name": "Public link present", "score": 3, "weight": 3, "insight": "GitHub link detected."},
+    {"name": "Recent activity (assumed)", "score": 4, "weight": 5, "insight": "Add recent commits/pins."},
+    {"name": "Domain-relevant projects", "score": 4, "weight": 6, "insight": "Keep repos aligned to role."},
+)
+_GH_CRIT_MISSING = ({"name": "Public link present", "score": 0, "weight": 3, "insight": "Add your GitHub link."},)
+_GH_SCORE_PRESENT = sum(c["score"] for c in _GH_CRIT_PRESENT)
+
+_LC_CRIT_PRESENT = (
+    {"name": "Link present", "score": 2, "weight": 2, "insight": "Profile link detected."},
+    {"name": "Problem variety (assumed)", "score": 3, "weight": 5, "insight": "Cover DP/Graphs/Greedy."},
+    {"name": "Consistency (assumed)", "score": 3, "weight": 4, "insight": "Regular practice helps."},
+)
+_LC_CRIT_MISSING = ({"name": "Link present", "score": 0, "weight": 2, "insight": "Include your LeetCode link."},)
+_LC_SCORE_PRESENT = sum(c["score"] for c in _LC_CRIT_PRESENT)
+
+_PORT_CRIT_PRESENT = (
+    {"name": "Link present", "score": 2, "weight": 2, "insight": "Portfolio detected."},
+    {"name": "Project write-ups (assumed)", "score": 3, "weight": 4, "insight": "Explain problems & impact."},
+    {"name": "Interactive demos (assumed)", "score": 2, "weight": 3, "insight": "Add live demos if possible."},
+)
+_PORT_CRIT_MISSING = ({"name": "Link present", "score": 0, "weight": 2, "insight": "Add a simple portfolio site."},)
+_PORT_SCORE_PRESENT = sum(c["score"] for c in _PORT_CRIT_PRESENT)
+
+_LI_CRIT_PRESENT = ({"name": "Public link present", "score": 3, "weight": 3, "insight": "LinkedIn detected."},)
+_LI_CRIT_MISSING = (
+    {"name": "Public link present", "score": 0, "weight": 3, "insight": "Add a public LinkedIn URL to boost visibility."},
+)
+
+_RESUME_CRIT = (
+    {"name": "ATS-friendly layout", "score": 3, "weight": 3, "insight": "Readable fonts, minimal columns."},
+    {"name": "Action verbs & results", "score": 4, "weight": 4, "insight": "Quantify achievements."},
+    {"name": "Keyword alignment", "score": 3, "weight": 3, "insight": "Mirror JD keywords."},
+    {"name": "Brevity", "score": 2, "weight": 2, "insight": "Keep to 1–2 pages."},
+    {"name": "Clarity", "score": 3, "weight": 3, "insight": "Avoid jargon/repetition."},
+)
+
+_CERT_CRIT_PRESENT = (
+    {"name": "Role-relevant", "score": 5, "weight": 5, "insight": "Keep recent & relevant."},
+    {"name": "Credible issuer", "score": 5, "weight": 5, "insight": "Prefer AWS, MS, Coursera, etc."},
+    {"name": "Recency", "score": 3, "weight": 3, "insight": "Within 2 years preferred."},
+    {"name": "Completeness", "score": 2, "weight": 2, "insight": "Title + issuer clearly listed."},
+)
+_CERT_CRIT_MISSING = (
+    {"name": "Certifications present", "score": 0, "weight": 15, "insight": "Consider 1–2 role-aligned certs."},
+)
+
+
 def calculate_dynamic_ats_score(
     resume_text: str,
     github_username: Optional[str],
@@ -248,30 +471,37 @@ def calculate_dynamic_ats_score(
     """
     Lightweight, deterministic-ish scoring. No heavy libs. No network calls here.
     """
-    weights = TECHNICAL_WEIGHTS.copy()
+    if not resume_text or len(resume_text) < _MIN_RESUME_CHARS:
+        # Extraction failed or nothing usable; skip the scans entirely.
+        return {
+            "sections": {},
+            "total_score": 0,
+            "overall_score_average": 0,
+            "overall_grade": "Poor",
+            "suggestions": ["Upload a parseable resume (text-layer PDF or DOCX)."],
+        }
+
+    weights = TECHNICAL_WEIGHTS
     sections: Dict[str, Dict] = {}
     suggestions: List[str] = []
 
     text = resume_text or ""
     github_presence = bool(github_username)
     leetcode_presence = bool(leetcode_username)
-    portfolio_presence = bool(re.search(r"https?://[a-z0-9\-]+\.(com|io|dev|app|me|net|in|org)", text, re.I))
-    linkedin_presence = bool(re.search(r"linkedin\.com/in/", text, re.I))
-    cert_presence = bool(re.search(r"\b(certification|certified|course|certificate)\b", text, re.I))
+    flags = {"port": False, "linkedin": False, "cert": False}
+    for m in _PRESENCE_RE.finditer(text):
+        flags[m.lastgroup] = True
+        if all(flags.values()):
+            break
+    portfolio_presence = flags["port"]
+    linkedin_presence = flags["linkedin"]
+    cert_presence = flags["cert"]
 
     # 1) GitHub Profile
-    github_score = 0
-    github_criteria = []
     if github_presence:
-        # small pseudo-criteria to avoid network calls
-        github_criteria = [
-            {"name": "Public link present", "score": 3, "weight": 3, "insight": "GitHub link detected."},
-            {"name": "Recent activity (assumed)", "score": 4, "weight": 5, "insight": "Add recent commits/pins."},
-            {"name": "Domain-relevant projects", "score": 4, "weight": 6, "insight": "Keep repos aligned to role."},
-        ]
-        github_score = sum(c["score"] for c in github_criteria)
+        github_score, github_criteria = _GH_SCORE_PRESENT, _GH_CRIT_PRESENT
     else:
-        github_criteria = [{"name": "Public link present", "score": 0, "weight": 3, "insight": "Add your GitHub link."}]
+        github_score, github_criteria = 0, _GH_CRIT_MISSING
         suggestions.append("Add a GitHub profile link with pinned, recent projects.")
 
     sections["GitHub Profile"] = {
@@ -282,17 +512,10 @@ def calculate_dynamic_ats_score(
     }
 
     # 2) LeetCode / DSA
-    leetcode_score = 0
-    leetcode_criteria = []
     if leetcode_presence:
-        leetcode_criteria = [
-            {"name": "Link present", "score": 2, "weight": 2, "insight": "Profile link detected."},
-            {"name": "Problem variety (assumed)", "score": 3, "weight": 5, "insight": "Cover DP/Graphs/Greedy."},
-            {"name": "Consistency (assumed)", "score": 3, "weight": 4, "insight": "Regular practice helps."},
-        ]
-        leetcode_score = sum(c["score"] for c in leetcode_criteria)
+        leetcode_score, leetcode_criteria = _LC_SCORE_PRESENT, _LC_CRIT_PRESENT
     else:
-        leetcode_criteria = [{"name": "Link present", "score": 0, "weight": 2, "insight": "Include your LeetCode link."}]
+        leetcode_score, leetcode_criteria = 0, _LC_CRIT_MISSING
         suggestions.append("Include a LeetCode link to showcase DSA practice.")
 
     sections["LeetCode/DSA Skills"] = {
@@ -303,17 +526,10 @@ def calculate_dynamic_ats_score(
     }
 
     # 3) Portfolio
-    portfolio_score = 0
-    portfolio_criteria = []
     if portfolio_presence:
-        portfolio_criteria = [
-            {"name": "Link present", "score": 2, "weight": 2, "insight": "Portfolio detected."},
-            {"name": "Project write-ups (assumed)", "score": 3, "weight": 4, "insight": "Explain problems & impact."},
-            {"name": "Interactive demos (assumed)", "score": 2, "weight": 3, "insight": "Add live demos if possible."},
-        ]
-        portfolio_score = sum(c["score"] for c in portfolio_criteria)
+        portfolio_score, portfolio_criteria = _PORT_SCORE_PRESENT, _PORT_CRIT_PRESENT
     else:
-        portfolio_criteria = [{"name": "Link present", "score": 0, "weight": 2, "insight": "Add a simple portfolio site."}]
+        portfolio_score, portfolio_criteria = 0, _PORT_CRIT_MISSING
         suggestions.append("Publish a simple portfolio with 2–3 best projects.")
 
     sections["Portfolio Website"] = {
@@ -324,16 +540,10 @@ def calculate_dynamic_ats_score(
     }
 
     # 4) LinkedIn
-    linkedin_score = 3 if linkedin_presence else 0
-    linkedin_criteria = [
-        {
-            "name": "Public link present",
-            "score": linkedin_score,
-            "weight": 3,
-            "insight": "Add a public LinkedIn URL to boost visibility." if not linkedin_presence else "LinkedIn detected.",
-        }
-    ]
-    if not linkedin_presence:
+    if linkedin_presence:
+        linkedin_score, linkedin_criteria = 3, _LI_CRIT_PRESENT
+    else:
+        linkedin_score, linkedin_criteria = 0, _LI_CRIT_MISSING
         suggestions.append("Add a public LinkedIn link (custom URL preferred).")
 
     sections["LinkedIn"] = {
@@ -345,33 +555,19 @@ def calculate_dynamic_ats_score(
 
     # 5) Resume (ATS Score) — placeholder here; real value can override in views
     resume_section_score = 65  # neutral placeholder; views will override with ats_resume_scoring()
-    resume_criteria = [
-        {"name": "ATS-friendly layout", "score": 3, "weight": 3, "insight": "Readable fonts, minimal columns."},
-        {"name": "Action verbs & results", "score": 4, "weight": 4, "insight": "Quantify achievements."},
-        {"name": "Keyword alignment", "score": 3, "weight": 3, "insight": "Mirror JD keywords."},
-        {"name": "Brevity", "score": 2, "weight": 2, "insight": "Keep to 1–2 pages."},
-        {"name": "Clarity", "score": 3, "weight": 3, "insight": "Avoid jargon/repetition."},
-    ]
     sections["Resume (ATS Score)"] = {
         "score": resume_section_score,
         "grade": get_grade_tag(resume_section_score),
         "weight": weights["Resume (ATS Score)"],
-        "sub_criteria": resume_criteria,
+        "sub_criteria": _RESUME_CRIT,
     }
 
     # 6) Certifications
     if cert_presence:
-        cert_score = 65
-        cert_criteria = [
-            {"name": "Role-relevant", "score": 5, "weight": 5, "insight": "Keep recent & relevant."},
-            {"name": "Credible issuer", "score": 5, "weight": 5, "insight": "Prefer AWS, MS, Coursera, etc."},
-            {"name": "Recency", "score": 3, "weight": 3, "insight": "Within 2 years preferred."},
-            {"name": "Completeness", "score": 2, "weight": 2, "insight": "Title + issuer clearly listed."},
-        ]
+        cert_score, cert_criteria = 65, _CERT_CRIT_PRESENT
         cert_recs: List[str] = []
     else:
-        cert_score = 0
-        cert_criteria = [{"name": "Certifications present", "score": 0, "weight": 15, "insight": "Consider 1–2 role-aligned certs."}]
+        cert_score, cert_criteria = 0, _CERT_CRIT_MISSING
         cert_recs = get_cert_suggestions("technical")
 
     sections["Certifications & Branding"] = {
@@ -382,10 +578,14 @@ def calculate_dynamic_ats_score(
         "recommendations": cert_recs,
     }
 
-    # Totals
-    total_score = sum(s.get("score", 0) * (s.get("weight", 0) / 100.0) for s in sections.values())
-    all_scores = [s.get("score", 0) for s in sections.values()]
-    overall_avg = int(round(sum(all_scores) / max(1, len(all_scores))))
+    # Totals (one pass)
+    total_score = 0.0
+    score_sum = 0
+    for s in sections.values():
+        sc = s.get("score", 0)
+        total_score += sc * (s.get("weight", 0) / 100.0)
+        score_sum += sc
+    overall_avg = int(round(score_sum / max(1, len(sections))))
 
     return {
         "sections": sections,
@@ -420,17 +620,39 @@ def prepare_chart_data(score_breakdown: Dict[str, Dict]) -> Dict[str, List]:
 # Text normalization + ATS resume scoring (lightweight)
 # ─────────────────────────────────────────────────────────────
 def normalize_text(t: str) -> str:
-    return re.sub(r"\s+", " ", (t or "")).strip().lower()
+    return _WS_RE.sub(" ", (t or "")).strip().lower()
 
 
-def keyword_match_rate(text: str, target_keywords: List[str]) -> float:
+def keyword_match_rate(text: str, target_keywords: List[str], automaton=None) -> float:
+    """
+    Share of target_keywords found (substring match) in the normalized text.
+    Pass a prebuilt Aho-Corasick `automaton` to find them all in one scan.
+    """
     if not target_keywords:
         return 0.0
-    t = normalize_text(text)
-    hits = sum(1 for kw in target_keywords if kw.lower() in t)
+    return keyword_match_rate_pre(normalize_text(text), target_keywords, automaton)
+
+
+def keyword_match_rate_pre(normalized: str, target_keywords: List[str], automaton=None) -> float:
+    """Same as keyword_match_rate, for text already passed through normalize_text."""
+    if not target_keywords:
+        return 0.0
+    if automaton is not None:
+        hits = len({kw for _, kw in automaton.iter(normalized)})
+    else:
+        hits = sum(1 for kw in target_keywords if kw.lower() in normalized)
     return hits / max(1, len(target_keywords))
 
 
+def _build_keyword_automaton(keywords: List[str]):
+    A = ahocorasick.Automaton()
+    for kw in keywords:
+        kw = kw.lower()
+        A.add_word(kw, kw)
+    A.make_automaton()
+    return A
+
+
 def ats_resume_scoring(metrics: Dict) -> Dict:
     """
     15-point breakdown => normalized 0..100 (lightweight).
@@ -497,34 +719,67 @@ ROLE_KEYWORDS: Dict[str, List[str]] = {
     "customer service": ["crm","zendesk","freshdesk","sla","csat","ticketing","call handling","escalation","knowledge base","communication"],
 }
 
+# One automaton per role, built at import (empty when pyahocorasick is missing)
+_ROLE_AUTOMATA = (
+    {role: _build_keyword_automaton(kws) for role, kws in ROLE_KEYWORDS.items()}
+    if ahocorasick is not None else {}
+)
+
+# Role lookup: one alternation over the (already lowercase) role names
+_ROLE_LC_KEYS = tuple(ROLE_KEYWORDS.keys())
+_ROLE_RE = re.compile("|".join(map(re.escape, _ROLE_LC_KEYS)))
+
+# What derive_resume_metrics yields for empty text, without running any scans.
+_EMPTY_RESUME_METRICS = {
+    "sections_present": False,
+    "single_column": True,
+    "text_extractable": False,
+    "action_verbs_per_bullet": 0.0,
+    "quantified_bullets_ratio": 0.0,
+    "keyword_match_rate": 0.0,
+    "pages": 1,
+    "avg_bullets_per_job": 1.0,
+    "repetition_rate": 0.08,
+    "jargon_rate": 0.12,
+    "unique_skills_count": 0,
+}
+
 def derive_resume_metrics(resume_text: str, role_title: str) -> Dict:
+    if not resume_text:
+        return dict(_EMPTY_RESUME_METRICS)
     t = normalize_text(resume_text)
     sections_present = any(k in t for k in ["experience", "work history"]) and ("education" in t) and ("skills" in t)
     single_column = True
     text_extractable = len(t) > 0
 
-    action_verbs = ["led","built","created","designed","implemented","developed","optimized","increased","reduced","launched","migrated","improved","delivered"]
-    action_verb_hits = sum(len(re.findall(rf"(^|\n|•|\-)\s*({v})\b", resume_text, flags=re.I)) for v in action_verbs)
-    bullets = max(1, len(re.findall(r"(\n•|\n-|\n\d+\.)", resume_text)))
+    action_verb_hits = len(_ACTION_VERB_RE.findall(resume_text))  # one pass for all verbs
+    bullets = max(1, resume_text.count("\n•") + resume_text.count("\n-")
+                  + len(_NUM_BULLET_RE.findall(resume_text)))
     action_verbs_per_bullet = min(1.0, action_verb_hits / bullets)
 
     quantified_bullets_ratio = min(
         1.0,
-        len(re.findall(r"\b\d+(\.\d+)?%?|\b(k|m|bn)\b", resume_text, flags=re.I)) / max(1, bullets)
+        len(_QUANT_RE.findall(resume_text)) / max(1, bullets)
     )
 
     pages = max(1, round(len(resume_text) / 2000))
-    avg_bullets_per_job = min(12.0, bullets / max(1, len(re.findall(r"\b(company|employer|experience)\b", t))))
+    avg_bullets_per_job = min(12.0, bullets / max(1, sum(t.count(w) for w in _COMPANY_WORDS)))
 
-    base_role = next((rk for rk in ROLE_KEYWORDS if rk in (role_title or "").lower()), None)
+    m = _ROLE_RE.search((role_title or "").lower())
+    base_role = m.group(0) if m else None
     kws = ROLE_KEYWORDS.get(base_role, [])
-    kmr = keyword_match_rate(resume_text, kws) if kws else 0.0
+    kmr = keyword_match_rate_pre(t, kws, _ROLE_AUTOMATA.get(base_role)) if kws else 0.0
 
     repetition_rate = 0.08 if "responsible for" not in t else 0.18
     jargon_rate = 0.12 if ("synergy" not in t and "leverage" not in t) else 0.22
 
-    unique_skills_count = len(set(re.findall(r"[a-zA-Z][a-zA-Z0-9\+\#\.\-]{1,20}", resume_text))) // 50
-    unique_skills_count = max(0, min(unique_skills_count, 15))
+    # Score caps at 15 (= 750 unique tokens), so stop scanning once we get there.
+    seen_tokens = set()
+    for m in _TOKEN_RE.finditer(resume_text):
+        seen_tokens.add(m.group())
+        if len(seen_tokens) >= _UNIQUE_TOKEN_CAP:
+            break
+    unique_skills_count = max(0, min(len(seen_tokens) // 50, 15))
 
     return {
         "sections_present": sections_present,
@@ -540,66 +795,76 @@ def derive_resume_metrics(resume_text: str, role_title: str) -> Dict:
         "unique_skills_count": unique_skills_count,
     }
 
-def generate_pie_chart_v2(sections):
-    import matplotlib
-    matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
-    import io, base64
+# Server-side pie PNG for the non-technical report
+_PIE_ASPECTS = (
+    "Format & Layout",
+    "File Type & Parsing",
+    "Section Headings & Structure",
+    "Job-Title & Core Skills",
+    "Dedicated Skills Section",
+)
+_PIE_COLORS = ('#4CAF50', '#2196F3', '#FF9800', '#dc3545', '#673AB7')
+_PIE_LOCK = threading.Lock()
+_pie_fig = None
 
-    # Only keep the five main aspects
-    main_aspects = [
-        "Format & Layout",
-        "File Type & Parsing",
-        "Section Headings & Structure",
-        "Job-Title & Core Skills",
-        "Dedicated Skills Section"
-    ]
 
-    labels = []
-    sizes = []
-    colors = ['#4CAF50', '#2196F3', '#FF9800', '#dc3545', '#673AB7']
+def _pie_slices(sections) -> Tuple[Tuple[str, ...], Tuple]:
+    # Only keep the five main aspects
+    labels = tuple(a for a in _PIE_ASPECTS if a in sections)
+    sizes = tuple(sections[a].get('score', 0) for a in labels)
+    return labels, sizes
 
-    for aspect in main_aspects:
-        if aspect in sections:
-            score = sections[aspect].get('score', 0)
-            labels.append(aspect)
-            sizes.append(score)
 
+def generate_pie_chart_v2(sections):
+    """
+    Base64 PNG of the five main aspects, cached per (labels, sizes).
+    """
+    labels, sizes = _pie_slices(sections)
     if not sizes or sum(sizes) == 0:
         return None  # Avoid division by zero
-
-    fig, ax = plt.subplots(figsize=(10, 10), facecolor='#121212')
-    wedges, texts, autotexts = ax.pie(
-    sizes,
-    autopct='%1.1f%%',
-    colors=colors,
-    textprops={'color': "white", 'fontsize': 20}  # ✅ Added font size here
-    )
-    plt.axis('equal')
-
-    # Add space between pie and legend
-    plt.subplots_adjust(bottom=0.25)  # Pushes legend down a bit
-
-    # Legend
-    legend_labels = [f"{label}: {size}" for label, size in zip(labels, sizes)]
-    ax.legend(
-        wedges,
-        legend_labels,
-        title="Main Aspects",
-        loc='lower center',
-        bbox_to_anchor=(0.5, -0.5),  # More negative moves it further down
-        fontsize=20,
-        title_fontsize=20,
-        frameon=False,
-        labelcolor='white'
-    )
-
-
-    plt.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', facecolor='#121212')
-    buf.seek(0)
-    encoded = base64.b64encode(buf.read()).decode('utf-8')
-    buf.close()
-    return encoded
\ No newline at end of file
+    return _render_pie_png(labels, sizes)
+
+
+@lru_cache(maxsize=256)
+def _render_pie_png(labels: Tuple[str, ...], sizes: Tuple) -> str:
+    import base64
+    from matplotlib.figure import Figure
+
+    global _pie_fig
+    with _PIE_LOCK:
+        # One reusable Figure (no pyplot state); clf() is far cheaper than a new figure.
+        if _pie_fig is None:
+            _pie_fig = Figure(figsize=(10, 10), facecolor='#121212')
+        fig = _pie_fig
+        fig.clf()
+        ax = fig.subplots()
+        wedges, texts, autotexts = ax.pie(
+            sizes,
+            autopct='%1.1f%%',
+            colors=_PIE_COLORS,
+            textprops={'color': "white", 'fontsize': 20}
+        )
+        ax.axis('equal')
+
+        # Add space between pie and legend
+        fig.subplots_adjust(bottom=0.25)  # Pushes legend down a bit
+
+        # Legend
+        legend_labels = [f"{label}: {size}" for label, size in zip(labels, sizes)]
+        ax.legend(
+            wedges,
+            legend_labels,
+            title="Main Aspects",
+            loc='lower center',
+            bbox_to_anchor=(0.5, -0.5),  # More negative moves it further down
+            fontsize=20,
+            title_fontsize=20,
+            frameon=False,
+            labelcolor='white'
+        )
+
+        fig.tight_layout()
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', facecolor='#121212')
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
@@ -6,17 +6,22 @@ import os
 import re
 import io
 import base64
-import random
+import mimetypes
+import secrets
 import tempfile
+import uuid
 from typing import Dict, List
 
 from django.conf import settings
 from django.core.mail import send_mail
-from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.http import parse_etags
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET, require_POST
 
 # Twilio (use environment/setting variables, not hard-coded)
 from twilio.rest import Client
@@ -29,11 +34,9 @@ from .utils import (
     extract_github_username,
     extract_leetcode_username,
     calculate_dynamic_ats_score,
+    extract_links_combined,
 )
 
-# If you really need DOC parsing of legacy .doc:
-# from .utils import extract_text_from_doc  # uncomment if available
-
 # Non-technical scoring module (you referenced these)
 from .ats_score_non_tech import ats_scoring_non_tech_v2  # keep only the one you use
 
@@ -164,17 +167,20 @@ registered_users = {}  # key: mobile, value: email
 
 signup_otp_storage = {}
 
-import random, re
+import re
 from django.conf import settings
 from django.core.cache import cache
 from django.core.mail import send_mail
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from .tasks import send_otp_email_task
 
 # Optional: keep your in-memory mapping if you're using it elsewhere
 registered_users = {}   # {mobile:str -> email:str}
 
 OTP_TTL_SECONDS = 300  # 5 minutes
+OTP_RATE_LIMIT = 3  # sends allowed per email+IP per window
+OTP_RATE_WINDOW_SECONDS = 60
 
 def norm_email(email: str) -> str:
     return (email or "").strip().lower()
@@ -183,6 +189,14 @@ def norm_mobile(mobile: str) -> str:
     # Keep digits only; e.g., "+91 94945-57188" -> "919494557188"
     return re.sub(r"\D+", "", (mobile or "").strip())
 
+def new_otp() -> str:
+    """6-digit zero-padded code from the OS CSPRNG (no modulo bias)."""
+    return f"{secrets.randbelow(1_000_000):06d}"
+
+def otp_matches(stored, otp: str) -> bool:
+    # compare_digest rejects non-ASCII str, so compare the UTF-8 bytes
+    return bool(stored) and secrets.compare_digest(str(stored).encode(), (otp or "").encode())
+
 def send_otp_email(to_email: str, otp: str, subject: str):
     send_mail(
         subject=subject,
@@ -192,6 +206,26 @@ def send_otp_email(to_email: str, otp: str, subject: str):
         fail_silently=False,
     )
 
+def otp_rate_limited(request, email: str) -> bool:
+    """Fixed-window counter in the cache (add + atomic incr)."""
+    key = f"otp:rl:{email}:{request.META.get('REMOTE_ADDR', '')}"
+    if cache.add(key, 1, timeout=OTP_RATE_WINDOW_SECONDS):
+        return False
+    try:
+        return cache.incr(key) > OTP_RATE_LIMIT
+    except ValueError:  # window expired between add() and incr()
+        cache.set(key, 1, timeout=OTP_RATE_WINDOW_SECONDS)
+        return False
+
+def dispatch_otp_email(to_email: str, otp: str, subject: str):
+    """Queue the mail on Celery when a broker is configured, else send inline."""
+    if getattr(settings, "OTP_MAIL_ASYNC", False) and send_otp_email_task is not None:
+        send_otp_email_task.delay(to_email, otp, subject)
+    else:
+        send_otp_email(to_email, otp, subject)
+
+_RATE_LIMITED = {"status": "error", "message": "Too many OTP requests. Please wait a minute and try again."}
+
 # ---------------------------
 # SIGNUP (email + mobile) -> OTP to email
 # ---------------------------
@@ -207,13 +241,15 @@ def send_signup_otp(request):
 
     if not email or not mobile:
         return JsonResponse({"status": "error", "message": "Email and mobile required"}, status=400)
+    if otp_rate_limited(request, email):
+        return JsonResponse(_RATE_LIMITED, status=429)
 
-    otp = f"{random.randint(100000, 999999)}"
+    otp = new_otp()
     cache_key = f"signup_otp:{email}:{mobile}"
     cache.set(cache_key, otp, timeout=OTP_TTL_SECONDS)
 
     try:
-        send_otp_email(email, otp, subject="Your ApplyWizz Signup OTP")
+        dispatch_otp_email(email, otp, subject="Your ApplyWizz Signup OTP")
         return JsonResponse({"status": "success", "message": "OTP sent to your email"})
     except Exception as e:
         return JsonResponse({"status": "error", "message": f"Failed to send OTP: {e}"}, status=500)
@@ -230,7 +266,7 @@ def verify_signup_otp(request):
     cache_key = f"signup_otp:{email}:{mobile}"
     stored_otp = cache.get(cache_key)
 
-    if stored_otp and stored_otp == otp:
+    if otp_matches(stored_otp, otp):
         # Register user (store mapping as you already do)
         registered_users[mobile] = email
         cache.delete(cache_key)
@@ -249,13 +285,15 @@ def send_login_otp(request):
     email = norm_email(request.POST.get("email", ""))
     if not email:
         return JsonResponse({"status": "error", "message": "Email required"}, status=400)
+    if otp_rate_limited(request, email):
+        return JsonResponse(_RATE_LIMITED, status=429)
 
-    otp = f"{random.randint(100000, 999999)}"
+    otp = new_otp()
     cache_key = f"login_otp:{email}"
     cache.set(cache_key, otp, timeout=OTP_TTL_SECONDS)
 
     try:
-        send_otp_email(email, otp, subject="Your ApplyWizz Login OTP")
+        dispatch_otp_email(email, otp, subject="Your ApplyWizz Login OTP")
         return JsonResponse({"status": "success", "message": "OTP sent to your email"})
     except Exception as e:
         return JsonResponse({"status": "error", "message": f"Failed to send OTP: {e}"}, status=500)
@@ -271,7 +309,7 @@ def verify_login_otp(request):
     cache_key = f"login_otp:{email}"
     stored_otp = cache.get(cache_key)
 
-    if stored_otp and stored_otp == otp:
+    if otp_matches(stored_otp, otp):
         cache.delete(cache_key)
         # TODO: log the user in (set session) if you have a User model
         return JsonResponse({"status": "success", "redirect_url": "/upload_resume"})
@@ -280,71 +318,36 @@ def verify_login_otp(request):
 
 # ========= Upload page =========
 def upload_resume(request):
-    return render(request, "upload_resume.html")
+    return render(request, "upload_resume.html", {"analyze_async": _analyze_async()})
 
 
 # ========= Pie chart helper (dark theme friendly) =========
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from functools import lru_cache
+from .services.pie import render_pie_svg
 
-from typing import Dict
-import io, base64
-import matplotlib.pyplot as plt
+PIE_CACHE_SECONDS = 3600
 
-from typing import Dict
-import io, base64
-import matplotlib.pyplot as plt
-
-def generate_pie_chart_tech(sections: Dict) -> str | None:
+def generate_pie_chart_tech(sections: Dict, result_key: str | None = None) -> str | None:
     """
     sections: { "Section Name": {"score": number}, ... }
-    Returns base64 PNG string or None if no data.
+    Returns inline SVG markup or None if no data.
     No percentages inside slices; legend (2 per row) shown at the bottom.
+    With a result_key the SVG is also shared across processes via the Django cache.
     """
-    labels, sizes = [], []
+    items = []
     for label, data in (sections or {}).items():
         score = data.get("score", 0)
         if isinstance(score, (int, float)) and score == score:  # not NaN
-            labels.append(label)
-            sizes.append(float(score))
-
-    if not sizes or sum(sizes) == 0:
-        return None
-
-    fig, ax = plt.subplots(figsize=(8, 8), facecolor="#121212")
-
-    # Pie without percentages or labels inside slices
-    wedges = ax.pie(
-        sizes,
-        labels=None,  # keep interior clean
-    )[0]
-
-    # Legend at bottom with slice colors
-    ax.legend(
-        wedges,
-        labels,
-        loc="lower center",
-        bbox_to_anchor=(0.5, -0.15),
-        fontsize=18,
-        frameon=False,
-        labelcolor="white",
-        ncol=2,  # Two per row
-        title="Categories",
-        title_fontsize=13
-    )
+            items.append((label, round(float(score), 1)))
+    items = tuple(items)
 
-    ax.set_facecolor("#121212")
-    plt.axis("equal")
-    plt.tight_layout()
+    if result_key:
+        return cache.get_or_set(f"pie:{result_key}", lambda: _render_pie_cached(items), PIE_CACHE_SECONDS)
+    return _render_pie_cached(items)
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", facecolor="#121212")
-    buf.seek(0)
-    encoded = base64.b64encode(buf.read()).decode("utf-8")
-    buf.close()
-    plt.close(fig)
-    return encoded
+@lru_cache(maxsize=256)
+def _render_pie_cached(items: tuple) -> str | None:
+    return render_pie_svg([label for label, _ in items], [size for _, size in items])
 
 
 
@@ -352,58 +355,99 @@ def generate_pie_chart_tech(sections: Dict) -> str | None:
 
 # ========= TECHNICAL ANALYZE → report_technical.html =========
 # --- Helper for stable cache key ---
-import hashlib, json
+import hashlib
+
+def _make_result_key(role_type: str, role_slug: str, resume_sha: str, github_username: str = "", leetcode_username: str = "") -> str:
+    # Cache key only (not crypto): BLAKE2b over \x1f-separated fields. The resume
+    # comes in pre-hashed (resume_digest), so this never rescans the text.
+    payload = f"{role_type}\x1f{role_slug}\x1f{resume_sha}\x1f{github_username or ''}\x1f{leetcode_username or ''}"
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
 
-def _make_result_key(role_type: str, role_slug: str, resume_text: str, github_username: str = "", leetcode_username: str = "") -> str:
-    payload = json.dumps({
-        "role_type": role_type,
-        "role_slug": role_slug,
-        "resume_hash": hashlib.sha256((resume_text or "").encode("utf-8")).hexdigest(),
-        "github": github_username or "",
-        "leetcode": leetcode_username or "",
-    }, sort_keys=True)
-    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+def resume_digest(resume_text: str) -> str:
+    """BLAKE2b-128 of the extracted text; computed once per upload and carried in the report context."""
+    return hashlib.blake2b((resume_text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+ATS_CACHE_SECONDS = 3600
+
+def _scored(resume_text: str, role_title: str, resume_sha: str | None = None):
+    """(metrics, ats_resume_scoring dict) for this resume + role, cached so refreshes skip rescoring."""
+    key = f"ats:{_make_result_key('ats', role_title, resume_sha or resume_digest(resume_text))}"
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    metrics = derive_resume_metrics(resume_text, role_title)
+    scored = (metrics, ats_resume_scoring(metrics))
+    cache.set(key, scored, ATS_CACHE_SECONDS)
+    return scored
 
 
 # --- Read-only report views (no recompute on refresh) ---
-def show_report_technical(request):
-    ctx = request.session.get("resume_context_tech")
-    if not ctx:
-        return redirect("upload_page")
-    return render(request, "resume_result.html", ctx)
+# kind -> (session key, screen template, PDF template)
+_REPORTS = {
+    "tech": ("resume_context_tech", "resume_result.html", "resume_result_pdf.html"),
+    "nontech": ("resume_context_nontech", "score_of_non_tech.html", "score_of_non_tech_pdf.html"),
+}
 
-def show_report_nontechnical(request):
-    ctx = request.session.get("resume_context_nontech")
+def _store_report(request, kind: str, context: Dict, prerender: bool = True) -> None:
+    """Keep one report per session: the latest analysis replaces the other kind."""
+    for other, (session_key, _, _) in _REPORTS.items():
+        if other == kind:
+            request.session[session_key] = context
+        else:
+            request.session.pop(session_key, None)
+    # Most users download next: have a worker render the PDF while they read.
+    if prerender and getattr(settings, "PDF_ASYNC", False) and prerender_report_pdf_task is not None:
+        transaction.on_commit(lambda: prerender_report_pdf_task.delay(context, kind))
+
+def _show_report(request, kind: str):
+    session_key, template, _ = _REPORTS[kind]
+    ctx = request.session.get(session_key)
     if not ctx:
-        return redirect("upload_page")
-    return render(request, "score_of_non_tech.html", ctx)
-
-from collections import OrderedDict
+        # nothing cached: send back to upload
+        return redirect("upload_resume")
 
-def _ordered_sections(sections):
-    key_mapping = {
-        "ATS": "Resume (ATS Readiness)",
-        "GitHub": "GitHub Score",
-        "LeetCode": "LeetCode Score",
-        "LinkedIn": "LinkedIn Profile",
-        "Portfolio": "Portfolio",
-        "Certifications": "Certifications",
-    }
+    # Same result key -> same page, so refresh/back can be answered with a 304.
+    etag = f'"{kind}-{ctx["result_key"]}"' if ctx.get("result_key") else None
+    if etag and etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = render(request, template, {**ctx, "pdf_async": _pdf_async()})
+    if etag:
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, must-revalidate"
+    return response
 
-    desired_order = ["ATS", "GitHub", "LeetCode", "LinkedIn", "Portfolio", "Certifications"]
+def show_report_technical(request):
+    return _show_report(request, "tech")
 
-    ordered = []
-    for name in desired_order:
-        key = key_mapping.get(name)
-        if key and key in sections:
-            ordered.append((key, sections[key]))
+def show_report_nontechnical(request):
+    return _show_report(request, "nontech")
+
+# Report display order; sections not listed keep their order after these.
+_TECH_SECTION_ORDER = (
+    "Resume (ATS Score)",
+    "GitHub Profile",
+    "Portfolio Website",
+    "LeetCode/DSA Skills",
+    "LinkedIn",
+    "Certifications & Branding",
+)
+_SCORE_SECTION_ORDER = (
+    "Resume (ATS Readiness)",
+    "GitHub Score",
+    "LeetCode Score",
+    "LinkedIn Profile",
+    "Portfolio",
+    "Certifications",
+)
 
-    existing_keys = {k for k, _ in ordered}
-    for key, value in sections.items():
-        if key not in existing_keys:
-            ordered.append((key, value))
+def _order_sections(sections, order=_TECH_SECTION_ORDER):
+    ordered = {k: sections[k] for k in order if k in sections}
+    ordered.update((k, v) for k, v in sections.items() if k not in ordered)
+    return list(ordered.items())
 
-    return ordered
+def _ordered_sections(sections):
+    return _order_sections(sections, _SCORE_SECTION_ORDER)
 
 
 
@@ -426,49 +470,16 @@ from django.shortcuts import render
 from django.http import HttpResponseBadRequest
 import os
 
-def _quick_resume_ats_percent(resume_text: str, role_title: str) -> float:
-    """
-    Heuristic ATS% (0–100) for non-technical: mirrors your ATS subcriteria.
-    """
-    t = _norm(resume_text)
-    # Sections
-    sections_present = any(k in t for k in ["experience","work history"]) and ("education" in t) and ("skills" in t)
-    single_column = True  # assume ok unless you detect otherwise
-    text_extractable = len(t) > 0
-    pts_layout = int(sections_present) + int(single_column) + int(text_extractable)  # /3
-
-    # Action verbs & quantified
-    action_verbs = ["led","built","created","designed","implemented","developed","optimized","increased","reduced","launched","improved","delivered"]
-    bullets = max(1, len(re.findall(r"(\n•|\n-|\n\d+\.)", resume_text)))
-    av_hits = sum(len(re.findall(rf"(^|\n|•|\-)\s*({v})\b", resume_text, flags=re.I)) for v in action_verbs)
-    av_per_bullet = min(1.0, av_hits / bullets)
-    quant_ratio = min(1.0, len(re.findall(r"\b\d+(\.\d+)?%?|\b(k|m|bn)\b", resume_text, flags=re.I)) / bullets)
-    pts_actions = (2 if av_per_bullet >= 0.8 else 1 if av_per_bullet >= 0.5 else 0) \
-                + (2 if quant_ratio >= 0.6 else 1 if quant_ratio >= 0.3 else 0)     # /4
-
-    # Keywords
-    kws = _NONTECH_ROLE_KEYWORDS.get(role_title, [])
-    cover = 0.0
-    if kws:
-        cover = sum(1 for k in kws if k in t) / len(kws)
-    pts_kw = 3 if cover >= 0.75 else 2 if cover >= 0.5 else 1 if cover >= 0.3 else 0  # /3
-
-    # Brevity
-    pages = max(1, round(len(resume_text) / 2000))
-    avg_bullets = bullets / max(1, len(re.findall(r"\b(company|employer|experience)\b", t)))
-    pts_brev = (1 if pages <= 2 else 0) + (1 if avg_bullets <= 7 else 0)              # /2
-
-    # Jargon / repetition
-    rep = 0.18 if "responsible for" in t else 0.08
-    jar = 0.22 if any(j in t for j in ["synergy","leverage"]) else 0.12
-    unique_skills_count = len(set(re.findall(r"[a-zA-Z][a-zA-Z0-9\+\#\.\-]{1,20}", resume_text))) // 50
-    pts_clean = (1 if rep <= 0.10 else 0) + (1 if jar <= 0.15 else 0) + (1 if unique_skills_count >= 8 else 0)  # /3
-
-    earned = pts_layout + pts_actions + pts_kw + pts_brev + pts_clean  # max 15
-    return round((earned / 15.0) * 100.0, 2)
+from .utils import derive_resume_metrics, ats_resume_scoring
+from .tasks import run_analyze_tech_task, render_resume_pdf_task, prerender_report_pdf_task
+from django.db import transaction
+from django.urls import reverse
 
+def _analyze_async() -> bool:
+    return bool(getattr(settings, "ANALYZE_ASYNC", False)) and run_analyze_tech_task is not None
 
-from .utils import derive_resume_metrics, ats_resume_scoring
+def _wants_json(request) -> bool:
+    return "application/json" in request.headers.get("Accept", "")
 
 @require_POST
 def analyze_resume(request):
@@ -480,20 +491,44 @@ def analyze_resume(request):
 
     resume_file = request.FILES["resume"]
     ext = os.path.splitext(resume_file.name)[1].lower()
+    if ext not in (".pdf", ".docx"):
+        return HttpResponseBadRequest("Unsupported file format. Please upload a PDF or DOCX.")
+
+    fields = {k: request.POST[k] for k in ("tech_role", "github_username", "leetcode_username") if k in request.POST}
+
+    # With ANALYZE_ASYNC on, the upload page posts via fetch and polls
+    # analyze_status; a plain form post still gets the synchronous report.
+    if _analyze_async() and _wants_json(request):
+        resume_b64 = base64.b64encode(resume_file.read()).decode("ascii")
+        task = run_analyze_tech_task.delay(resume_b64, ext, fields)
+        request.session["analyze_task"] = task.id
+        return JsonResponse(
+            {"task_id": task.id, "status_url": reverse("analyze_status", args=[task.id])},
+            status=202,
+        )
+
+    context = build_technical_context(resume_file, ext, fields)
+    _store_report(request, "tech", context)
+    return redirect("show_report_technical")
+
 
+def build_technical_context(resume_file, ext: str, fields: Dict[str, str]) -> Dict:
+    """
+    Full technical analysis (extract, score, chart) -> report context.
+    Runs in the request (sync) or in a Celery worker (main.tasks).
+    """
     # Extract text from resume file
     if ext == ".pdf":
         resume_text = extract_text_from_pdf(resume_file)
-    elif ext == ".docx":
-        resume_text = extract_text_from_docx(resume_file)
     else:
-        return HttpResponseBadRequest("Unsupported file format. Please upload a PDF or DOCX.")
+        resume_text = extract_text_from_docx(resume_file)
 
+    resume_sha = resume_digest(resume_text)
     applicant_name = extract_applicant_name(resume_text) or "Candidate"
-    github_username = (request.POST.get("github_username") or "").strip() or extract_github_username(resume_text) or ""
-    leetcode_username = (request.POST.get("leetcode_username") or "").strip() or extract_leetcode_username(resume_text) or ""
+    github_username = (fields.get("github_username") or "").strip() or extract_github_username(resume_text) or ""
+    leetcode_username = (fields.get("leetcode_username") or "").strip() or extract_leetcode_username(resume_text) or ""
 
-    role_slug = request.POST.get("tech_role", "software_engineer")
+    role_slug = fields.get("tech_role", "software_engineer")
     TECH_ROLE_MAP = {
         "software_engineer": "Software Engineer",
         "data_scientist": "Data Scientist",
@@ -503,13 +538,8 @@ def analyze_resume(request):
     }
     role_title = TECH_ROLE_MAP.get(role_slug, "Software Engineer")
 
-    # Use your utils function to derive metrics
-    metrics = derive_resume_metrics(resume_text, role_title)
-
-    # Use ats_resume_scoring (from utils.py) to get ATS Resume scoring dict
-    ats_resume_score_dict = ats_resume_scoring(metrics)
-    metrics = derive_resume_metrics(resume_text, role_title)
-    ats_resume_score_dict = ats_resume_scoring(metrics)
+    # Metrics + ATS Resume scoring dict (utils.py), cached per resume/role
+    metrics, ats_resume_score_dict = _scored(resume_text, role_title, resume_sha)
 
     # Prefer normalized score_100; fall back to computing it from subtotal if missing
     raw_100 = ats_resume_score_dict.get("score_100")
@@ -544,145 +574,96 @@ def analyze_resume(request):
     }
 
 
-    # Define desired order of sections for display
-    desired_order = [
-        "Resume (ATS Score)",
-        "GitHub Profile",
-        "Portfolio Website",
-        "LeetCode/DSA Skills",
-        "LinkedIn",
-        "Certifications & Branding",
-    ]
-
-    # Prepare ordered sections list
-    score_breakdown_ordered = []
-    for key in desired_order:
-        if key in sections:
-            score_breakdown_ordered.append((key, sections[key]))
-    # Append any other sections not in desired_order at the end
-    for key, val in sections.items():
-        if key not in desired_order:
-            score_breakdown_ordered.append((key, val))
-
-    pie_chart_image = generate_pie_chart_tech(sections)
+    score_breakdown_ordered = _order_sections(sections)
+
+    result_key = _make_result_key("technical", role_slug, resume_sha, github_username, leetcode_username)
+    pie_chart_svg = generate_pie_chart_tech(sections, result_key)
     overall_score_average = int(ats_result.get("overall_score_average", 0))
     suggestions = (ats_result.get("suggestions") or [])[:2]
     recommended_certs = suggest_role_certifications(role_title)
 
+    text_lower = resume_text.lower()  # once, shared by the detections below
+
     context = {
-        "result_key": _make_result_key("technical", role_slug, resume_text, github_username, leetcode_username),
+        "result_key": result_key,
         "applicant_name": applicant_name,
-        "contact_detection": "YES" if any(s in resume_text.lower() for s in ["@", "phone", "email"]) else "NO",
-        "linkedin_detection": "YES" if "linkedin.com" in resume_text.lower() else "NO",
-        "github_detection": "YES" if ("github.com" in resume_text.lower() or github_username) else "NO",
+        "contact_detection": "YES" if any(s in text_lower for s in ["@", "phone", "email"]) else "NO",
+        "linkedin_detection": "YES" if "linkedin.com" in text_lower else "NO",
+        "github_detection": "YES" if (github_username or "github.com" in text_lower) else "NO",
         "ats_score": ats_resume_score,  # This is the ATS Resume score from ats_resume_scoring
         "overall_score_average": overall_score_average,
         "overall_grade": ats_result.get("overall_grade", ""),
         "score_breakdown": sections,
         "score_breakdown_ordered": score_breakdown_ordered,
-        "pie_chart_image": pie_chart_image,
+        "pie_chart_svg": pie_chart_svg,
         "missing_certifications": recommended_certs,
         "suggestions": suggestions,
         "role": role_title,
+        "resume_sha": resume_sha,
     }
+    return context
 
-    request.session["resume_context_tech"] = context
-    request.session.modified = True
-    return redirect("show_report_technical")
 
+@require_GET
+@never_cache
+def analyze_status(request, task_id: str):
+    """Poll endpoint for async technical analysis: {state, report_url}."""
+    if run_analyze_tech_task is None or request.session.get("analyze_task") != task_id:
+        return JsonResponse({"state": "UNKNOWN"}, status=404)
+    res = run_analyze_tech_task.AsyncResult(task_id)
+    payload = {"state": res.state}
+    if res.successful():
+        # First successful poll moves the worker's report into this session, so
+        # the report page, ETag and PDF download work as after a sync analysis.
+        stored = request.session.get("resume_context_tech") or {}
+        if stored.get("result_key") != res.result:
+            context = cache.get(f"report:{res.result}")
+            if context is None:
+                return JsonResponse({"state": "EXPIRED"}, status=410)
+            _store_report(request, "tech", context, prerender=False)  # the worker already did
+        payload["report_url"] = reverse("show_report_technical")
+    return JsonResponse(payload)
 
 
 
 
 
-# --- Non-technical helpers (self-contained) ---
 
-import re
+# ========= NON-TECHNICAL ANALYZE (PRG) =========
+# No legacy .doc reader is installed, so .doc is rejected with the other formats
+_NONTECH_UPLOAD_EXTS = frozenset({".pdf", ".docx"})
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from .tasks import sweep_stale_charts
 
-_NONTECH_ROLE_KEYWORDS = {
-    "Human Resources": ["recruitment","hiring","onboarding","payroll","hrms","policy","compliance","talent acquisition","employee engagement","grievance","training","performance review"],
-    "Marketing": ["seo","sem","campaign","content","email marketing","social media","branding","analytics","conversion","google ads","meta ads","roi","copywriting"],
-    "Sales": ["crm","pipeline","lead generation","prospecting","negotiation","quota","closing","upsell","cross-sell","demo","forecast"],
-    "Finance": ["budgeting","forecasting","reconciliation","audit","financial analysis","p&l","variance","gl","sap","tally","excel","balance sheet","cash flow"],
-    "Customer Service": ["crm","zendesk","freshdesk","sla","csat","ticketing","call handling","escalation","knowledge base","aht","nps","first call resolution"],
-}
+CHART_SWEEP_INTERVAL_SECONDS = 3600
 
-def _norm(t: str) -> str:
-    return re.sub(r"\s+", " ", (t or "").lower()).strip()
+def _storage_age(name: str) -> float | None:
+    try:
+        return (timezone.now() - default_storage.get_modified_time(name)).total_seconds()
+    except (OSError, NotImplementedError):
+        return None
 
-def _quick_resume_ats_percent(resume_text: str, role_title: str) -> float:
+def _chart_url(png_b64: str | None) -> str | None:
     """
-    Heuristic ATS% (0–100) for non-technical: mirrors your ATS subcriteria.
+    Store a base64 chart PNG once under charts/<hash>.png (default storage:
+    MEDIA_ROOT or S3) and return its URL, so pages carry a link, not the image.
+    Only session-held reports link to a chart, so charts older than
+    SESSION_COOKIE_AGE are swept (at most hourly).
     """
-    t = _norm(resume_text)
-    # Sections
-    sections_present = any(k in t for k in ["experience","work history"]) and ("education" in t) and ("skills" in t)
-    single_column = True  # assume ok unless you detect otherwise
-    text_extractable = len(t) > 0
-    pts_layout = int(sections_present) + int(single_column) + int(text_extractable)  # /3
-
-    # Action verbs & quantified
-    action_verbs = ["led","built","created","designed","implemented","developed","optimized","increased","reduced","launched","improved","delivered"]
-    bullets = max(1, len(re.findall(r"(\n•|\n-|\n\d+\.)", resume_text)))
-    av_hits = sum(len(re.findall(rf"(^|\n|•|\-)\s*({v})\b", resume_text, flags=re.I)) for v in action_verbs)
-    av_per_bullet = min(1.0, av_hits / bullets)
-    quant_ratio = min(1.0, len(re.findall(r"\b\d+(\.\d+)?%?|\b(k|m|bn)\b", resume_text, flags=re.I)) / bullets)
-    pts_actions = (2 if av_per_bullet >= 0.8 else 1 if av_per_bullet >= 0.5 else 0) \
-                + (2 if quant_ratio >= 0.6 else 1 if quant_ratio >= 0.3 else 0)     # /4
-
-    # Keywords
-    kws = _NONTECH_ROLE_KEYWORDS.get(role_title, [])
-    cover = 0.0
-    if kws:
-        cover = sum(1 for k in kws if k in t) / len(kws)
-    pts_kw = 3 if cover >= 0.75 else 2 if cover >= 0.5 else 1 if cover >= 0.3 else 0  # /3
-
-    # Brevity
-    pages = max(1, round(len(resume_text) / 2000))
-    avg_bullets = bullets / max(1, len(re.findall(r"\b(company|employer|experience)\b", t)))
-    pts_brev = (1 if pages <= 2 else 0) + (1 if avg_bullets <= 7 else 0)              # /2
-
-    # Jargon / repetition
-    rep = 0.18 if "responsible for" in t else 0.08
-    jar = 0.22 if any(j in t for j in ["synergy","leverage"]) else 0.12
-    unique_skills_count = len(set(re.findall(r"[a-zA-Z][a-zA-Z0-9\+\#\.\-]{1,20}", resume_text))) // 50
-    pts_clean = (1 if rep <= 0.10 else 0) + (1 if jar <= 0.15 else 0) + (1 if unique_skills_count >= 8 else 0)  # /3
-
-    earned = pts_layout + pts_actions + pts_kw + pts_brev + pts_clean  # max 15
-    return round((earned / 15.0) * 100.0, 2)
-
-def _role_match_percent(resume_text: str, role_title: str) -> tuple[float, dict]:
-    """
-    Role-Match% (0–100) from keyword coverage + density.
-    Weighted 70% coverage, 30% density.
-    """
-    t = _norm(resume_text)
-    kws = _NONTECH_ROLE_KEYWORDS.get(role_title, [])
-    if not kws:
-        return 0.0, {"keywords": [], "coverage": 0.0, "occurrences": 0}
-
-    coverage_hits = sum(1 for k in kws if k in t)
-    coverage = coverage_hits / len(kws)
-    pattern = "|".join(map(re.escape, kws))
-    occurrences = len(re.findall(pattern, t))
-    density = min(1.0, occurrences / (len(kws) * 2))
-
-    score = 0.70 * coverage + 0.30 * density
-    return round(score * 100.0, 2), {"keywords": kws, "coverage": round(coverage, 2), "occurrences": occurrences}
-
-
+    if not png_b64:
+        return None
+    ttl = settings.SESSION_COOKIE_AGE
+    data = base64.b64decode(png_b64)
+    name = f"charts/{hashlib.blake2b(data, digest_size=16).hexdigest()}.png"
+    age = _storage_age(name)
+    if age is None or age > ttl / 2:  # missing, or rewrite so it outlives this report
+        default_storage.delete(name)
+        default_storage.save(name, ContentFile(data))
+    if cache.add("charts:sweep", 1, CHART_SWEEP_INTERVAL_SECONDS):
+        sweep_stale_charts(ttl)
+    return default_storage.url(name)
 
-# ========= NON-TECHNICAL ANALYZE (PRG) =========
-from .utils import *
-from .utils import (
-    extract_text_from_pdf,
-    extract_text_from_docx,
-    extract_applicant_name,
-    extract_github_username,
-    extract_leetcode_username,
-    calculate_dynamic_ats_score,
-    extract_links_from_pdf  # <- Make sure this exists
-)
 @require_POST
 def analyze_resume_v2(request):
     context = {
@@ -692,7 +673,7 @@ def analyze_resume_v2(request):
         "overall_grade": "N/A",
         "score_breakdown": {},
         "suggestions": [],
-        "pie_chart_image": None,
+        "pie_chart_url": None,
         "detected_links": [],
         "error": None,
         "contact_detection": "NO",
@@ -704,24 +685,20 @@ def analyze_resume_v2(request):
         resume_file = request.FILES['resume']
         ext = os.path.splitext(resume_file.name)[1].lower()
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-            for chunk in resume_file.chunks():
-                tmp.write(chunk)
-            temp_path = tmp.name
-
-        if ext not in [".pdf", ".docx", ".doc"]:
-            context["error"] = "Unsupported file format. Please upload a PDF, DOCX, or DOC file."
-            return render(request, 'score_of_non_tech.html', context)
+        if ext not in _NONTECH_UPLOAD_EXTS:
+            # Same response as analyze_resume: the report template has no error slot
+            return HttpResponseBadRequest("Unsupported file format. Please upload a PDF or DOCX.")
 
+        # Read the upload once and hand the extractors an in-memory buffer
+        data = resume_file.read()
         if ext == ".pdf":
-            extracted_links, resume_text = extract_links_combined(temp_path)
-        elif ext == ".docx":
-            resume_text = extract_text_from_docx(temp_path)
-            extracted_links = []
+            extracted_links, resume_text = extract_links_combined(io.BytesIO(data))
         else:
-            resume_text = extract_text_from_doc(temp_path)
+            resume_text = extract_text_from_docx(io.BytesIO(data))
             extracted_links = []
 
+        resume_sha = resume_digest(resume_text)
+
         # Normalize text lowercase for detection
         text_lower = resume_text.lower()
 
@@ -740,10 +717,7 @@ def analyze_resume_v2(request):
         role_title = request.POST.get("role_title", "human resources")  # or some default non-tech role
 
         # Calculate ATS resume score using utils
-        metrics = derive_resume_metrics(resume_text, role_title)
-        ats_resume_score_dict = ats_resume_scoring(metrics)
-        metrics = derive_resume_metrics(resume_text, role_title)
-        ats_resume_score_dict = ats_resume_scoring(metrics)
+        metrics, ats_resume_score_dict = _scored(resume_text, role_title, resume_sha)
 
         # Prefer normalized score_100; fall back to computing it from subtotal if missing
         raw_100 = ats_resume_score_dict.get("score_100")
@@ -757,90 +731,207 @@ def analyze_resume_v2(request):
  # scale to 0-100
 
         # Calculate other ATS scoring as needed
-        ats_result = ats_scoring_non_tech_v2(temp_path)
+        ats_result = ats_scoring_non_tech_v2(resume_file.name, text=resume_text)
 
         context.update({
+            "result_key": _make_result_key("non_technical", role_title, resume_sha),
+            "resume_sha": resume_sha,
             "applicant_name": applicant_name,
             "ats_score": ats_resume_score,  # use calculated ATS score here
             "overall_score_average": ats_result.get("overall_score_average", 0),
             "overall_grade": ats_result.get("overall_grade", "N/A"),
             "score_breakdown": ats_result.get("score_breakdown", {}),
-            "pie_chart_image": ats_result.get("pie_chart_image"),
+            "pie_chart_url": _chart_url(ats_result.get("pie_chart_image")),
             "suggestions": ats_result.get("suggestions", []),
             "detected_links": extracted_links,
             "contact_detection": contact_detection,
             "github_detection": github_detection,
             "linkedin_detection": linkedin_detection,
         })
+        _store_report(request, "nontech", context)
+        return redirect("show_report_nontechnical")
 
     return render(request, 'score_of_non_tech.html', context)
 
 
 # ========= PDF download (server-side render) =========
-from django.template.loader import get_template
-from django.http import HttpResponse
-from weasyprint import HTML, CSS
+# WeasyPrint (Pango/Cairo/Fontconfig via cffi) is imported on the first render,
+# so web workers that never build a PDF don't pay for it at boot.
+
+PDF_SPOOL_MAX_BYTES = 4 * 1024 * 1024
+PDF_CHUNK_BYTES = 64 * 1024
+PDF_CACHE_SECONDS = 86400
 
+def _drain(fh, chunk_size: int = PDF_CHUNK_BYTES, unlink: str | None = None):
+    """Yield a file in chunks, closing it (and deleting `unlink`) when done or when the client goes away."""
+    try:
+        while chunk := fh.read(chunk_size):
+            yield chunk
+    finally:
+        fh.close()
+        if unlink:
+            try:
+                os.unlink(unlink)
+            except OSError:
+                pass
+
+# Screen-only parts of the report pages: WeasyPrint never runs the html2canvas/jsPDF
+# scripts, and external stylesheet links are fetched and parsed for nothing.
+_PDF_STRIP_RE = re.compile(
+    r"<script\b[^>]*>.*?</script\s*>"
+    r"|<link\b[^>]*\brel=[\"']?stylesheet\b[^>]*>",
+    re.I | re.S,
+)
+
+def render_report_pdf(context: Dict, template_path: str, target) -> None:
+    """Render a report template with WeasyPrint into target (path or binary file)."""
+    html_string = get_template(template_path).render(context)
+    html_string = _PDF_STRIP_RE.sub("", html_string)
+    from weasyprint import HTML
+
+    HTML(string=html_string, base_url=_PDF_BASE_URL, url_fetcher=_pdf_url_fetcher).write_pdf(
+        target=target, font_config=_font_config()
+    )
+
+# Site-relative URLs in the report (/media/charts/..., /static/...) resolve against
+# this placeholder origin, and _pdf_url_fetcher reads them straight from storage:
+# no HTTP round-trip to ourselves and no base64 data: URIs in the HTML.
+_PDF_BASE_URL = "http://report.invalid/"
+
+def _pdf_url_fetcher(url: str):
+    from weasyprint import default_url_fetcher
+
+    if url.startswith(_PDF_BASE_URL):
+        path = "/" + url[len(_PDF_BASE_URL):].split("?", 1)[0]
+        mime_type = mimetypes.guess_type(path)[0]
+        if path.startswith(settings.MEDIA_URL):
+            with default_storage.open(path[len(settings.MEDIA_URL):]) as fh:
+                return {"string": fh.read(), "mime_type": mime_type}
+        if path.startswith(settings.STATIC_URL):
+            from django.contrib.staticfiles import finders
+
+            found = finders.find(path[len(settings.STATIC_URL):])
+            if found:
+                return {"file_obj": open(found, "rb"), "mime_type": mime_type}
+        raise ValueError(f"Not a report asset: {path}")
+    return default_url_fetcher(url)
+
+_FONT_CONFIG = None
+
+def _font_config():
+    """One FontConfiguration per process, so fonts aren't re-registered for every PDF."""
+    global _FONT_CONFIG
+    if _FONT_CONFIG is None:
+        from weasyprint.text.fonts import FontConfiguration
+
+        _FONT_CONFIG = FontConfiguration()
+    return _FONT_CONFIG
+
+def _pdf_cache_key(context: Dict, template_path: str) -> str | None:
+    return f"pdf:{context['result_key']}:{template_path}" if context.get("result_key") else None
+
+def cache_report_pdf(context: Dict, kind: str = "tech") -> None:
+    """Render the report PDF ahead of time and park it where download_resume_pdf looks first."""
+    template_path = _REPORTS[kind][2]
+    pdf_key = _pdf_cache_key(context, template_path)
+    if pdf_key is None or cache.get(pdf_key) is not None:
+        return
+    buf = io.BytesIO()
+    render_report_pdf(context, template_path, buf)
+    if buf.tell() <= PDF_SPOOL_MAX_BYTES:
+        cache.set(pdf_key, buf.getvalue(), PDF_CACHE_SECONDS)
+
+@require_GET
+@never_cache
 def download_resume_pdf(request):
     """
     Renders the last analysis context from session into a PDF using WeasyPrint.
+    With PDF_ASYNC, JSON clients get the render queued instead: 202 + job/status/fetch URLs.
     """
-    context = request.session.get("resume_context_tech") # Assuming you want to use the tech context
-    if not context:
-        # Fallback to non-tech context if technical is not found
-        context = request.session.get("resume_context_nontech")
-    
-    if not context:
-        return HttpResponse("No resume analysis found in session.", status=404)
-
-    # Choose template dynamically based on the context
-    if context.get("role") in ["Human Resources", "Marketing", "Sales", "Finance", "Customer Service"]:
-        template_path = "score_of_non_tech.html"
+    # The session holds at most one report; bail out before any template/WeasyPrint work.
+    for kind, (session_key, _, template_path) in _REPORTS.items():
+        context = request.session.get(session_key)
+        if context:
+            break
     else:
-        template_path = "resume_result.html"
-
-    template = get_template(template_path)
-    html_string = template.render(context)
-
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="resume_report.pdf"'
+        return HttpResponse("No resume analysis found in session.", status=404)
 
-    # Generate PDF using WeasyPrint
+    # Same analysis + template -> same PDF: repeat clicks (and the copy pre-rendered
+    # right after analysis) skip WeasyPrint entirely.
+    pdf_key = _pdf_cache_key(context, template_path)
+    if pdf_key:
+        pdf_bytes = cache.get(pdf_key)
+        if pdf_bytes is not None:
+            return _pdf_response(io.BytesIO(pdf_bytes), len(pdf_bytes))
+
+    if _pdf_async() and _wants_json(request):
+        job_id = uuid.uuid4().hex
+        render_resume_pdf_task.apply_async((context, template_path, job_id), task_id=job_id)
+        request.session["pdf_job"] = job_id
+        return JsonResponse({
+            "job_id": job_id,
+            "status_url": reverse("download_resume_pdf_status", args=[job_id]),
+            "fetch_url": reverse("download_resume_pdf_fetch", args=[job_id]),
+        }, status=202)
+
+    # Generate PDF using WeasyPrint into a spooled file (RAM up to 4 MB, then disk)
+    buf = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES)
     try:
-        HTML(string=html_string).write_pdf(response)
+        render_report_pdf(context, template_path, buf)
     except Exception as e:
+        buf.close()
         return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
-    
-    return response
+    size = buf.tell()
+    buf.seek(0)
+    if pdf_key and size <= PDF_SPOOL_MAX_BYTES:
+        cache.set(pdf_key, buf.read(), PDF_CACHE_SECONDS)
+        buf.seek(0)
+    return _pdf_response(buf, size)
 
-# views.py (add these)
+def _pdf_async() -> bool:
+    return bool(getattr(settings, "PDF_ASYNC", False)) and render_resume_pdf_task is not None
 
-from django.urls import reverse
-import hashlib
-import json
-
-def _make_result_key(role_type: str, role_slug: str, resume_text: str, github_username: str = "", leetcode_username: str = "") -> str:
-    payload = json.dumps({
-        "role_type": role_type,
-        "role_slug": role_slug,
-        "resume_hash": hashlib.sha256((resume_text or "").encode("utf-8")).hexdigest(),
-        "github": github_username or "",
-        "leetcode": leetcode_username or "",
-    }, sort_keys=True)
-    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+def _pdf_response(fh, size: int, unlink: str | None = None) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(_drain(fh, unlink=unlink), content_type="application/pdf")
+    response["Content-Disposition"] = 'attachment; filename="resume_report.pdf"'
+    response["Content-Length"] = str(size)
+    return response
 
-def show_report_technical(request):
-    ctx = request.session.get("resume_context_tech")
-    if not ctx:
-        # nothing cached: send back to upload
-        return redirect("upload_page")
-    return render(request, "resume_result.html", ctx)
+def _own_pdf_job(request, job_id: str):
+    """AsyncResult for job_id if this session queued it, else None."""
+    if render_resume_pdf_task is None or request.session.get("pdf_job") != job_id:
+        return None
+    return render_resume_pdf_task.AsyncResult(job_id)
+
+@require_GET
+@never_cache
+def download_resume_pdf_status(request, job_id: str):
+    res = _own_pdf_job(request, job_id)
+    if res is None:
+        return JsonResponse({"state": "UNKNOWN"}, status=404)
+    return JsonResponse({"state": res.state, "ready": res.successful()})
+
+@require_GET
+@never_cache
+def download_resume_pdf_fetch(request, job_id: str):
+    res = _own_pdf_job(request, job_id)
+    if res is None or not res.successful():
+        return HttpResponse("PDF not ready.", status=404)
+    accel_prefix = getattr(settings, "PDF_ACCEL_REDIRECT_PREFIX", "")
+    if accel_prefix:
+        # nginx sends the file itself (sendfile); this worker only writes headers.
+        # The worker's TTL sweep deletes it later.
+        response = HttpResponse(content_type="application/pdf")
+        response["Content-Disposition"] = 'attachment; filename="resume_report.pdf"'
+        response["X-Accel-Redirect"] = accel_prefix + os.path.basename(res.result)
+        return response
+    try:
+        fh = open(res.result, "rb")
+    except OSError:
+        return HttpResponse("PDF expired, please download again.", status=410)
+    # One download per render: the file is removed once it has been streamed.
+    return _pdf_response(fh, os.fstat(fh.fileno()).st_size, unlink=res.result)
 
-def show_report_nontechnical(request):
-    ctx = request.session.get("resume_context_nontech")
-    if not ctx:
-        return redirect("upload_page")
-    return render(request, "score_of_non_tech.html", ctx)
 
 
 